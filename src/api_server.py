@@ -4,11 +4,13 @@ Provides REST API and serves web UI
 """
 
 import asyncio
+import atexit
 import json
 import uuid
 import os
 import logging
-import traceback
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from typing import Optional
 from pathlib import Path
@@ -25,6 +27,7 @@ from orchestration.settings_manager import SettingsManager
 from orchestration.event_emitter import get_event_emitter
 
 from orchestration.mcp_executor import MCPExecutor
+from orchestration.llm_client import close_http_clients
 from orchestration.types import ToolDefinition
 
 
@@ -33,6 +36,15 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+
+# Hand log records to a background thread so handler I/O never blocks the event loop
+_log_queue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+_log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
 
@@ -108,15 +120,16 @@ async def lifespan(app: FastAPI):
         # Cleanup MCP executor after discovery
         await mcp_executor.cleanup()
 
-    except Exception as e:
-        logger.error(f"✗ Failed to preload MCP tools: {str(e)}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+    except Exception:
+        logger.exception("✗ Failed to preload MCP tools")
         logger.warning("Server will continue, but first request may be slow")
 
     yield
 
     # Cleanup on shutdown
     logger.info("Shutting down Personal Assistant...")
+    await close_http_clients()
+    settings_manager.close()
 
 
 # Create FastAPI app with lifespan
@@ -265,8 +278,7 @@ async def get_settings(user_id: str = "test_user", tenant: str = "test_tenant"):
         logger.info(f"Successfully retrieved settings for user_id={user_id}")
         return settings_data
     except Exception as e:
-        logger.error(f"Error getting settings for user_id={user_id}, tenant={tenant}: {str(e)}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        logger.exception("Error getting settings for user_id=%s, tenant=%s", user_id, tenant)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -301,8 +313,7 @@ async def save_settings(request: SettingsRequest):
             raise HTTPException(status_code=500, detail="Failed to save settings")
 
     except Exception as e:
-        logger.error(f"Error saving settings for user_id={request.user_id}, tenant={request.tenant}: {str(e)}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        logger.exception("Error saving settings for user_id=%s, tenant=%s", request.user_id, request.tenant)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -320,8 +331,7 @@ async def test_connection(request: TestConnectionRequest):
         logger.info(f"Connection test result: {result}")
         return result
     except Exception as e:
-        logger.error(f"Error testing connection for provider={request.provider}: {str(e)}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        logger.exception("Error testing connection for provider=%s", request.provider)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -458,8 +468,7 @@ async def get_chat_history(session_id: str, limit: Optional[int] = None):
         }
 
     except Exception as e:
-        logger.error(f"Error getting chat history for session_id={session_id}: {str(e)}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        logger.exception("Error getting chat history for session_id=%s", session_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -490,8 +499,7 @@ async def delete_chat_history(session_id: str):
             }
 
     except Exception as e:
-        logger.error(f"Error deleting chat history for session_id={session_id}: {str(e)}")
-        logger.error(f"Full traceback:\n{traceback.format_exc()}")
+        logger.exception("Error deleting chat history for session_id=%s", session_id)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -515,6 +523,7 @@ def main():
 
     print("\n" + "=" * 80 + "\n")
 
+    # uvicorn's default loop="auto" runs on uvloop when it is installed
     if dev_mode:
         # Development mode with hot reload
         uvicorn.run(
@@ -3,6 +3,7 @@ ConfigLoader - Loads settings for the orchestration system
 """
 
 import os
+from pathlib import Path
 from typing import Optional, List
 from dotenv import load_dotenv
 
@@ -84,9 +85,19 @@ class ConfigLoader:
             llm_base_url=llm_base_url,
             max_retries=max_retries,
             timeout=timeout,
-            available_tools=available_tools
+            available_tools=available_tools,
+            parallel_resolution=os.getenv("PARALLEL_RESOLUTION", "false").lower() == "true",
+            plan_cache_enabled=os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true",
+            plan_cache_path=os.getenv("PLAN_CACHE_PATH") or self._default_plan_cache_path()
         )
 
+    @staticmethod
+    def _default_plan_cache_path() -> str:
+        """Plan cache database next to the settings database"""
+        data_dir = Path(__file__).parent.parent.parent / "data"
+        data_dir.mkdir(exist_ok=True)
+        return str(data_dir / "plan_cache.db")
+
     def _get_default_tools(self) -> list[ToolDefinition]:
         """
         Get default MCP tools
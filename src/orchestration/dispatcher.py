@@ -44,6 +44,7 @@ class TaskDispatcher:
         # Clear resolver only if this is a fresh plan (no existing results)
         if not existing_results or existing_results.total_steps == 0:
             self.resolver.clear()
+            self.resolver.prewarm(plan.steps)
             print("[TaskDispatcher] Fresh plan - cleared resolver")
         else:
             # Preserve successful step outputs in resolver
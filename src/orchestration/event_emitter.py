@@ -44,6 +44,12 @@ class ExecutionEventEmitter:
                 if not self._subscribers[trace_id]:
                     del self._subscribers[trace_id]
 
+    def has_subscribers(self, trace_id: str) -> bool:
+        """
+        Check whether any subscriber is listening for a specific trace_id
+        """
+        return bool(self._subscribers.get(trace_id))
+
     async def emit(self, event: ExecutionEvent):
         """
         Emit an event to all subscribers of the trace_id
@@ -0,0 +1,269 @@
+"""
+JSON Stream - Incrementally parses streamed JSON responses
+"""
+
+import json
+import re
+from typing import Any, Callable, Optional
+
+# Characters that change the parser state outside and inside of JSON strings
+_STRUCTURAL_PATTERN = re.compile(r'[\[\]{}",]')
+_STRING_PATTERN = re.compile(r'["\\]')
+
+
+class JsonArrayStream:
+    """
+    Parses the top-level items of a JSON array while its text is still streaming
+
+    Text before the root value (e.g. a ```json fence) is skipped. Only an array
+    root is split into items; for an object root `streamable` is False and the
+    caller should parse the full text instead.
+    """
+
+    def __init__(self, loads: Callable[[str], Any] = json.loads):
+        self.loads = loads
+        self.root: Optional[str] = None
+        self.items: list[Any] = []
+        self.done = False
+        self.failed = False
+        self._buffer: list[str] = []  # Text of the current top-level item
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def streamable(self) -> bool:
+        """True while the stream is a well-formed JSON array"""
+        return self.root != "{" and not self.failed
+
+    @property
+    def complete(self) -> bool:
+        """True once the whole array has been parsed successfully"""
+        return self.root == "[" and self.done and not self.failed
+
+    def feed(self, chunk: str) -> list[Any]:
+        """
+        Feed the next chunk of streamed text
+
+        Args:
+            chunk: Next piece of the response text
+
+        Returns:
+            Items completed by this chunk
+        """
+        new_items: list[Any] = []
+        if self.done or not self.streamable:
+            return new_items
+
+        pos = 0
+        if self.root is None:
+            match = re.search(r"[\[{]", chunk)
+            if not match:
+                return new_items
+            self.root = match.group()
+            if self.root == "{":
+                return new_items
+            self._depth = 1
+            pos = match.end()
+
+        buffer = self._buffer
+        end = len(chunk)
+        if self._escaped and pos < end:
+            # Escape sequence split across chunks
+            buffer.append(chunk[pos])
+            pos += 1
+            self._escaped = False
+
+        while pos < end:
+            if self._in_string:
+                match = _STRING_PATTERN.search(chunk, pos)
+                if not match:
+                    buffer.append(chunk[pos:])
+                    break
+                if match.group() == "\\":
+                    if match.end() < end:
+                        buffer.append(chunk[pos:match.end() + 1])
+                        pos = match.end() + 1
+                    else:
+                        buffer.append(chunk[pos:])
+                        self._escaped = True
+                        break
+                else:
+                    buffer.append(chunk[pos:match.end()])
+                    pos = match.end()
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL_PATTERN.search(chunk, pos)
+            if not match:
+                buffer.append(chunk[pos:])
+                break
+
+            char = match.group()
+            index = match.start()
+            if char == '"':
+                buffer.append(chunk[pos:index + 1])
+                self._in_string = True
+            elif char in "[{":
+                buffer.append(chunk[pos:index + 1])
+                self._depth += 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 0:
+                    # End of the root array
+                    buffer.append(chunk[pos:index])
+                    self._flush(new_items)
+                    self.done = True
+                    break
+                buffer.append(chunk[pos:index + 1])
+            elif self._depth == 1:
+                # Comma between top-level items
+                buffer.append(chunk[pos:index])
+                self._flush(new_items)
+                if self.failed:
+                    break
+            else:
+                buffer.append(chunk[pos:index + 1])
+            pos = index + 1
+
+        return new_items
+
+    def _flush(self, new_items: list[Any]) -> None:
+        """Parse the buffered item text, if any"""
+        text = "".join(self._buffer).strip()
+        self._buffer.clear()
+        if not text:
+            return
+        try:
+            item = self.loads(text)
+        except ValueError:
+            # e.g. unquoted placeholders; the caller re-parses the full text
+            self.failed = True
+            return
+        self.items.append(item)
+        new_items.append(item)
+
+
+# Characters that change the brace depth outside of JSON strings
+_BRACE_PATTERN = re.compile(r'[{}"]')
+
+
+class JsonFieldStream:
+    """
+    Parses the object value of one field of a JSON response while it is still streaming
+
+    The value is parsed as soon as its closing brace arrives, so the caller can stop
+    reading the rest of the response. Only object values are extracted; for any other
+    value (or an unparsable one) `failed` is set and the caller should parse the full text.
+    """
+
+    def __init__(self, field: str, loads: Callable[[str], Any] = json.loads):
+        self.loads = loads
+        self.value: Any = None
+        self.done = False
+        self.failed = False
+        self._key = f'"{field}"'
+        self._key_pattern = re.compile(rf'{re.escape(self._key)}\s*:\s*')
+        self._head = ""  # Unscanned text the key may still start in
+        self._parts: Optional[list[str]] = None  # Value text so far, once the key was found
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Feed the next chunk of streamed text
+
+        Each chunk is scanned once; only a short tail is kept while looking for the key.
+
+        Args:
+            chunk: Next piece of the response text
+
+        Returns:
+            True once the field value has been parsed
+        """
+        if self.done or self.failed:
+            return self.done
+
+        if self._parts is None:
+            head = self._head + chunk
+            match = self._key_pattern.search(head)
+            if not match or match.end() == len(head):
+                self._head = head[match.start() if match else self._unfinished_key_start(head):]
+                return False
+            if head[match.end()] != "{":
+                self.failed = True
+                return False
+            self._head = ""
+            self._parts = []
+            chunk = head[match.end():]
+
+        return self._scan(self._parts, chunk)
+
+    def _unfinished_key_start(self, head: str) -> int:
+        """
+        Find where a key cut off by the end of the text starts
+
+        The key spans two quotes, so an unfinished one starts at one of the last two.
+
+        Args:
+            head: Text searched without a match
+
+        Returns:
+            Offset of the unfinished key, or the end of the text if there is none
+        """
+        last = head.rfind('"')
+        for start in (head.rfind('"', 0, last), last):
+            if start >= 0:
+                tail = head[start:start + len(self._key)]
+                if self._key.startswith(tail):
+                    return start
+        return len(head)
+
+    def _scan(self, parts: list[str], chunk: str) -> bool:
+        """Scan the next piece of the value text, parsing it once its object closes"""
+        pos = 0
+        end = len(chunk)
+        while pos < end:
+            if self._escaped:
+                # Character after a backslash, possibly in the next chunk
+                self._escaped = False
+                pos += 1
+                continue
+
+            if self._in_string:
+                match = _STRING_PATTERN.search(chunk, pos)
+                if not match:
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escaped = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _BRACE_PATTERN.search(chunk, pos)
+            if not match:
+                break
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    parts.append(chunk[:pos])
+                    try:
+                        self.value = self.loads("".join(parts))
+                    except ValueError:
+                        # e.g. unquoted placeholders; the caller re-parses the full text
+                        self.failed = True
+                        return False
+                    self.done = True
+                    return True
+
+        parts.append(chunk)
+        return False
+
@@ -0,0 +1,53 @@
+"""
+JSON Utils - Fast JSON parsing and formatting shared by the orchestration modules
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Fast JSON parsing for LLM responses; orjson.JSONDecodeError subclasses json.JSONDecodeError
+fast_loads = orjson.loads if orjson else json.loads
+
+
+def fast_dumps(obj: Any) -> str:
+    """
+    Serialize an object as compact JSON, keeping non-ASCII text unescaped
+
+    Args:
+        obj: JSON-compatible object
+
+    Returns:
+        JSON string
+    """
+    if orjson:
+        try:
+            return orjson.dumps(obj).decode()
+        except TypeError:
+            # e.g. integers beyond 64 bits, which orjson rejects
+            pass
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def dumps_indent(obj: Any) -> str:
+    """
+    Serialize an object as indented JSON for prompts and diagnostics
+
+    Args:
+        obj: Object to serialize; unsupported values are rendered with str()
+
+    Returns:
+        JSON string indented by two spaces
+    """
+    if orjson:
+        try:
+            return orjson.dumps(obj, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # e.g. integers beyond 64 bits, which orjson rejects
+            pass
+    return json.dumps(obj, indent=2, default=str, ensure_ascii=False)
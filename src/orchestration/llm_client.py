@@ -2,19 +2,125 @@
 LLM Client abstraction - supports multiple LLM providers
 """
 
+import asyncio
+import hashlib
+import json
 import os
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from anthropic import Anthropic
+from collections import OrderedDict
+from contextlib import aclosing
+from typing import List, Dict, Any, Optional, AsyncIterator
+import anthropic
+from anthropic import AsyncAnthropic
 import openai
 
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+# Connection pools shared by every LLM client of an SDK, so all planners reuse warm
+# keep-alive connections instead of each opening its own (HTTP/2 when h2 is installed)
+_http_clients: Dict[str, Any] = {}
+
+
+def _shared_http_client(sdk: Any) -> Any:
+    """
+    Get the shared HTTP client for an SDK, creating it on first use
+
+    Args:
+        sdk: The anthropic or openai module; each SDK needs its own httpx client type
+
+    Returns:
+        The SDK's DefaultAsyncHttpxClient, which keeps the SDK's default timeouts and limits
+    """
+    client = _http_clients.get(sdk.__name__)
+    if client is None or client.is_closed:
+        client = sdk.DefaultAsyncHttpxClient(http2=h2 is not None)
+        _http_clients[sdk.__name__] = client
+    return client
+
+
+async def close_http_clients() -> None:
+    """Close the shared HTTP clients and their pooled connections, e.g. on server shutdown"""
+    clients = list(_http_clients.values())
+    _http_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+# Per-provider request options for LLM_LATENCY_MODE=optimized; these may cost more per token.
+# Anthropic has no per-request latency option (its service_tier default "auto" already uses
+# priority capacity when the organization has it), so the setting is ignored there.
+_LATENCY_OPTIONS: Dict[str, Dict[str, Any]] = {
+    # Use priority capacity (service_tier requires openai>=1.35)
+    "openai": {"service_tier": "priority"},
+    # Route to the provider with the lowest latency for the model
+    "openrouter": {"extra_body": {"provider": {"sort": "latency"}}},
+}
+
+LATENCY_MODES = ("standard", "optimized")
+
+
+def _with_system(messages: List[Dict[str, str]], system: Optional[str]) -> List[Dict[str, str]]:
+    """Prepend the system prompt as a message (OpenAI-compatible APIs cache shared prefixes)"""
+    if not system:
+        return messages
+    return [{"role": "system", "content": system}, *messages]
+
+
+async def stream_with_idle_timeout(stream: AsyncIterator[str], idle_timeout: float) -> AsyncIterator[str]:
+    """
+    Relay a response stream, aborting it when no chunk arrives in time
+
+    Args:
+        stream: Stream from generate_stream()
+        idle_timeout: Maximum seconds to wait for the next chunk
+
+    Raises:
+        TimeoutError: If the stream stalls for longer than idle_timeout
+    """
+    async with aclosing(stream):
+        while True:
+            try:
+                chunk = await asyncio.wait_for(anext(stream), idle_timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"LLM stream idle for more than {idle_timeout:g}s") from None
+            yield chunk
+
 
 class LLMClient(ABC):
     """Abstract LLM client interface"""
 
     @abstractmethod
-    async def generate(self, messages: List[Dict[str, str]], max_tokens: int = 4096) -> str:
-        """Generate a response from the LLM"""
+    async def generate(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> str:
+        """
+        Generate a response from the LLM
+
+        Args:
+            messages: Conversation messages
+            max_tokens: Maximum tokens to generate
+            system: Static system prompt; providers cache it across calls where supported
+        """
+        pass
+
+    async def generate_stream(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM as text chunks
+
+        Providers without streaming support yield the whole response as one chunk.
+        """
+        yield await self.generate(messages, max_tokens, system=system)
+
+    async def warmup(self) -> None:
+        """Open a connection to the provider ahead of the first request"""
         pass
 
 
@@ -22,78 +128,309 @@ class AnthropicClient(LLMClient):
     """Anthropic Claude client"""
 
     def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
-        kwargs = {"api_key": api_key}
+        kwargs = {"api_key": api_key, "http_client": _shared_http_client(anthropic)}
         if base_url:
             kwargs["base_url"] = base_url
-        self.client = Anthropic(**kwargs)
+        self.client = AsyncAnthropic(**kwargs)
         self.model = model
 
-    async def generate(self, messages: List[Dict[str, str]], max_tokens: int = 4096) -> str:
+    async def warmup(self) -> None:
+        """Open a connection with a model listing, which costs no tokens"""
+        await self.client.models.list(limit=1)
+
+    @staticmethod
+    def _system_kwargs(system: Optional[str]) -> Dict[str, Any]:
+        """System prompt marked for prompt caching, so repeated calls reuse its prefix"""
+        if not system:
+            return {}
+        return {"system": [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]}
+
+    async def generate(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> str:
         """Generate response using Anthropic API"""
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
             max_tokens=max_tokens,
-            messages=messages
+            messages=messages,
+            **self._system_kwargs(system)
         )
         return response.content[0].text
 
+    async def generate_stream(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream response text using Anthropic API"""
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=messages,
+            **self._system_kwargs(system)
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
 
 class OpenAIClient(LLMClient):
     """OpenAI GPT client"""
 
-    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
-        kwargs = {"api_key": api_key}
+    def __init__(
+        self, api_key: str, model: str, base_url: Optional[str] = None, latency_mode: str = "standard"
+    ):
+        kwargs = {"api_key": api_key, "http_client": _shared_http_client(openai)}
         if base_url:
             kwargs["base_url"] = base_url
-        self.client = openai.OpenAI(**kwargs)
+        self.client = openai.AsyncOpenAI(**kwargs)
         self.model = model
+        self.request_options = _LATENCY_OPTIONS["openai"] if latency_mode == "optimized" else {}
+
+    async def warmup(self) -> None:
+        """Open a connection with a model listing, which costs no tokens"""
+        await self.client.models.list()
 
-    async def generate(self, messages: List[Dict[str, str]], max_tokens: int = 4096) -> str:
+    async def generate(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> str:
         """Generate response using OpenAI API"""
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             max_tokens=max_tokens,
-            messages=messages
+            messages=_with_system(messages, system),
+            **self.request_options
         )
         return response.choices[0].message.content
 
+    async def generate_stream(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream response text using OpenAI API"""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=_with_system(messages, system),
+            stream=True,
+            **self.request_options
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
 
 class OpenRouterClient(LLMClient):
     """OpenRouter client (uses OpenAI-compatible API)"""
 
-    def __init__(self, api_key: str, model: str, base_url: Optional[str] = None):
+    def __init__(
+        self, api_key: str, model: str, base_url: Optional[str] = None, latency_mode: str = "standard"
+    ):
         self.api_key = api_key
         self.model = model
         # Configure OpenAI client to use OpenRouter
-        self.client = openai.OpenAI(
+        self.client = openai.AsyncOpenAI(
             base_url=base_url or "https://openrouter.ai/api/v1",
-            api_key=api_key
+            api_key=api_key,
+            http_client=_shared_http_client(openai)
         )
+        self.request_options = _LATENCY_OPTIONS["openrouter"] if latency_mode == "optimized" else {}
 
-    async def generate(self, messages: List[Dict[str, str]], max_tokens: int = 4096) -> str:
+    async def warmup(self) -> None:
+        """Open a connection with a model listing, which costs no tokens"""
+        await self.client.models.list()
+
+    async def generate(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> str:
         """Generate response using OpenRouter API"""
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             max_tokens=max_tokens,
-            messages=messages
+            messages=_with_system(messages, system),
+            **self.request_options
         )
         return response.choices[0].message.content
 
+    async def generate_stream(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream response text using OpenRouter API"""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            max_tokens=max_tokens,
+            messages=_with_system(messages, system),
+            stream=True,
+            **self.request_options
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class CachedLLMClient(LLMClient):
+    """
+    LLM client wrapper that reuses responses for identical requests
+
+    Only calls made with cacheable=True are cached; the caller opts in for prompts
+    that are safe to replay (e.g. plan generation). Other calls always reach the
+    wrapped client, so a response that drives a tool call is never served stale.
+
+    Responses are keyed by a hash of the model, max_tokens, system prompt and messages and kept in
+    an in-memory LRU. A streamed response is cached once the stream has been read to the end;
+    a cached response is streamed back as a single chunk.
+
+    Identical requests arriving while one is still in flight wait for its response instead
+    of calling the LLM again (e.g. a request submitted twice). If the first call fails or
+    its stream is cut short without a stored response, the waiters call the LLM themselves.
+    """
+
+    def __init__(self, client: LLMClient, max_entries: int = 1024):
+        self.client = client
+        self.model = getattr(client, "model", "")
+        self.max_entries = max_entries
+        self._responses: OrderedDict[str, str] = OrderedDict()
+        # key -> future resolved with the response of the call in flight (None if it produced none)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _key(self, messages: List[Dict[str, str]], max_tokens: int, system: Optional[str]) -> str:
+        payload = json.dumps([self.model, max_tokens, system, messages], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def generate(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 4096,
+        system: Optional[str] = None,
+        cacheable: bool = False
+    ) -> str:
+        """Generate a response, reusing the cached one for an identical cacheable request"""
+        if not cacheable:
+            return await self.client.generate(messages, max_tokens, system=system)
+        key = self._key(messages, max_tokens, system)
+        cached = self._get(key)
+        if cached is None:
+            cached = await self._wait_in_flight(key)
+        if cached is not None:
+            return cached
+
+        future = self._begin(key)
+        try:
+            response = await self.client.generate(messages, max_tokens, system=system)
+            self._put(key, response)
+            return response
+        finally:
+            self._finish(key, future)
+
+    async def generate_stream(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 4096,
+        system: Optional[str] = None,
+        cacheable: bool = False
+    ) -> AsyncIterator[str]:
+        """Stream a response, reusing the cached one for an identical cacheable request"""
+        if not cacheable:
+            async for chunk in self.client.generate_stream(messages, max_tokens, system=system):
+                yield chunk
+            return
+        key = self._key(messages, max_tokens, system)
+        cached = self._get(key)
+        if cached is None:
+            cached = await self._wait_in_flight(key)
+        if cached is not None:
+            yield cached
+            return
+
+        future = self._begin(key)
+        try:
+            parts = []
+            async for chunk in self.client.generate_stream(messages, max_tokens, system=system):
+                parts.append(chunk)
+                yield chunk
+            # Not reached when the consumer stops early, so partial responses are never cached
+            self._put(key, "".join(parts))
+        finally:
+            self._finish(key, future)
+
+    def store(
+        self,
+        messages: List[Dict[str, str]],
+        response: str,
+        max_tokens: int = 4096,
+        system: Optional[str] = None
+    ) -> None:
+        """Cache a response for a request, e.g. one the caller stopped streaming early"""
+        self._put(self._key(messages, max_tokens, system), response)
+
+    def _get(self, key: str) -> Optional[str]:
+        cached = self._responses.get(key)
+        if cached is not None:
+            self._responses.move_to_end(key)
+        return cached
+
+    async def _wait_in_flight(self, key: str) -> Optional[str]:
+        """Wait for an identical request already in flight; None if there is none or it failed"""
+        future = self._in_flight.get(key)
+        if future is None:
+            return None
+        # Shielded so a cancelled waiter does not cancel the shared future
+        response = await asyncio.shield(future)
+        return response if response is not None else self._get(key)
+
+    def _begin(self, key: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        return future
+
+    def _finish(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.done():
+            future.set_result(None)
+
+    def _put(self, key: str, response: str) -> None:
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(response)
+        if response:
+            self._responses[key] = response
+            self._responses.move_to_end(key)
+            if len(self._responses) > self.max_entries:
+                self._responses.popitem(last=False)
+
+    async def warmup(self) -> None:
+        """Warm up the wrapped client"""
+        await self.client.warmup()
+
+    def discard(
+        self, messages: List[Dict[str, str]], max_tokens: int = 4096, system: Optional[str] = None
+    ) -> None:
+        """Remove the cached response of a request so the next call reaches the LLM"""
+        self._responses.pop(self._key(messages, max_tokens, system), None)
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        self._responses.clear()
+
 
 def create_llm_client(
     api_key: str,
     model: str,
     provider: str = "anthropic",
-    base_url: Optional[str] = None
+    base_url: Optional[str] = None,
+    latency_mode: str = "standard"
 ) -> LLMClient:
     """
     Factory function to create an LLM client based on provider
+
+    With latency_mode "optimized" requests use the provider's lower-latency option
+    (OpenAI priority capacity or OpenRouter latency-sorted routing), which may be billed
+    at a higher rate. Anthropic has no such option, so the mode is ignored for it.
     """
+    if latency_mode not in LATENCY_MODES:
+        raise ValueError(f"Unknown LLM latency mode: {latency_mode}")
     if provider == "anthropic":
         return AnthropicClient(api_key, model, base_url)
     elif provider == "openai":
-        return OpenAIClient(api_key, model, base_url)
+        return OpenAIClient(api_key, model, base_url, latency_mode)
     elif provider == "openrouter":
-        return OpenRouterClient(api_key, model, base_url)
+        return OpenRouterClient(api_key, model, base_url, latency_mode)
     else:
         raise ValueError(f"Unknown LLM provider: {provider}")
@@ -13,6 +13,7 @@ from contextlib import asynccontextmanager
 from fastmcp import Client
 
 from .types import Step, StepResult, ToolDefinition
+from .json_utils import fast_loads
 from .validators import validate_email
 
 
@@ -319,7 +320,7 @@ class MCPExecutor:
                 first_content = result[0]
                 if hasattr(first_content, 'text'):
                     try:
-                        return json.loads(first_content.text)
+                        return fast_loads(first_content.text)
                     except json.JSONDecodeError:
                         return {"success": True, "result": first_content.text}
                 elif isinstance(first_content, dict):
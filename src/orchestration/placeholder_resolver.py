@@ -3,20 +3,48 @@ Placeholder Resolver - Resolves placeholders in step inputs using previous step
 """
 
 import ast
+import logging
 import re
-from typing import Any, Dict, List, Optional
+import sys
+from typing import Any, Dict, List, Optional, Tuple
 from .types import Step, StepResult
 
+logger = logging.getLogger(__name__)
+
+# Sentinel for missing keys (step outputs may legitimately contain None)
+_MISSING = object()
+
 
 class PlaceholderResolver:
     """Resolves placeholders like {{step_id}} or {{step_id.field}} in step inputs"""
 
     # Support {{}} (double braces), ${} (dollar), and {} (single braces) patterns for flexibility
     # Pattern matches: {{...}}, ${...}, or {...}
-    PLACEHOLDER_PATTERN = re.compile(r'(\{\{([^}]+)\}\}|\$\{([^}]+)\}|\{([^}]+)\})')
+    # Placeholder content cannot contain braces or newlines, so a stray "{" can never
+    # make the scan run across lines looking for a closing brace.
+    PLACEHOLDER_PATTERN = re.compile(r'(\{\{([^{}\n]+)\}\}|\$\{([^{}\n]+)\}|\{([^{}\n]+)\})')
+
+    # Python array indexing inside a placeholder, e.g. "events[0]"
+    ARRAY_INDEX_PATTERN = re.compile(r'\[(\d+)\]')
+
+    # Step outputs with more nodes than this are resolved by walking the output instead
+    MAX_FLATTEN_NODES = 1000
+
+    __slots__ = ("_step_outputs", "_flat_outputs", "_path_cache", "_dispatch")
 
     def __init__(self):
         self._step_outputs: Dict[str, Any] = {}
+        # Per-step dotted path -> value index, e.g. {"step_0.events.0.id": "event_1", ...}
+        self._flat_outputs: Dict[str, Dict[str, Any]] = {}
+        # Parsed placeholder content: raw content -> (normalized, path parts or None for expressions)
+        self._path_cache: Dict[str, Tuple[str, Optional[Tuple[str, ...]]]] = {}
+        # Exact-type dispatch for _resolve_value. Inputs come from JSON, so they are
+        # always plain str/dict/list and never subclasses.
+        self._dispatch = {
+            str: self._resolve_string,
+            dict: self._resolve_dict,
+            list: self._resolve_list,
+        }
 
     def register_step_result(self, step_id: str, output: Any) -> None:
         """
@@ -26,8 +54,37 @@ class PlaceholderResolver:
             step_id: The step ID
             output: The step's output (can be dict, list, or primitive)
         """
+        # Interned ids let dict lookups short-circuit on identity
+        step_id = sys.intern(step_id)
         self._step_outputs[step_id] = output
-        print(f"[PlaceholderResolver] Registered output for step '{step_id}': {output}")
+
+        # Index every path once so placeholder lookups become a single dict access
+        flat = self._flatten_output(step_id, output)
+        if flat is not None:
+            self._flat_outputs[step_id] = flat
+        else:
+            self._flat_outputs.pop(step_id, None)
+        logger.debug("Registered output for step '%s': %s", step_id, output)
+
+    def prewarm(self, steps: List[Step]) -> None:
+        """
+        Parse every placeholder found in the given steps' inputs ahead of time,
+        so resolution only does cache lookups
+
+        Args:
+            steps: The plan steps whose inputs will be resolved later
+        """
+        stack: List[Any] = [step.input for step in steps]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, str):
+                if '{' in value:
+                    for match in self.PLACEHOLDER_PATTERN.finditer(value):
+                        self._parse_placeholder(match.group(2) or match.group(3) or match.group(4))
+            elif isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, list):
+                stack.extend(value)
 
     def resolve_step_input(self, step: Step) -> Step:
         """
@@ -39,7 +96,9 @@ class PlaceholderResolver:
         Returns:
             A new Step with placeholders resolved
         """
-        resolved_input = self._resolve_dict(step.input)
+        # Placeholders repeated within one input (e.g. in subject and body) are looked up once
+        memo: Dict[str, Any] = {}
+        resolved_input = self._resolve_dict(step.input, memo)
 
         # Create a new step with resolved input
         return Step(
@@ -50,25 +109,51 @@ class PlaceholderResolver:
             dependencies=step.dependencies
         )
 
-    def _resolve_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Recursively resolve placeholders in a dictionary"""
-        resolved = {}
-        for key, value in data.items():
-            resolved[key] = self._resolve_value(value)
-        return resolved
+    def _resolve_dict(self, data: Dict[str, Any], memo: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Recursively resolve placeholders in a dictionary
 
-    def _resolve_value(self, value: Any) -> Any:
+        Copy-on-write: the original dict is returned untouched when no value
+        changed, and a copy is only made once the first changed value is seen.
+        """
+        if memo is None:
+            memo = {}
+        resolved = None
+        for key, value in data.items():
+            new_value = self._resolve_value(value, memo)
+            if resolved is None:
+                if new_value is value:
+                    continue
+                resolved = dict(data)
+            resolved[key] = new_value
+        return data if resolved is None else resolved
+
+    def _resolve_list(self, data: List[Any], memo: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Recursively resolve placeholders in a list (copy-on-write, like _resolve_dict)"""
+        if memo is None:
+            memo = {}
+        # Items are dispatched inline rather than through _resolve_value, which saves a
+        # call per item on the common string-only lists (e.g. recipients)
+        dispatch = self._dispatch
+        resolved = None
+        for index, item in enumerate(data):
+            resolve = dispatch.get(type(item))
+            if resolve is None:
+                continue
+            new_item = resolve(item, memo)
+            if resolved is None:
+                if new_item is item:
+                    continue
+                resolved = list(data)
+            resolved[index] = new_item
+        return data if resolved is None else resolved
+
+    def _resolve_value(self, value: Any, memo: Dict[str, Any]) -> Any:
         """Resolve placeholders in a single value"""
-        if isinstance(value, str):
-            return self._resolve_string(value)
-        elif isinstance(value, dict):
-            return self._resolve_dict(value)
-        elif isinstance(value, list):
-            return [self._resolve_value(item) for item in value]
-        else:
-            return value
+        resolve = self._dispatch.get(type(value))
+        return resolve(value, memo) if resolve else value
 
-    def _resolve_string(self, text: str) -> Any:
+    def _resolve_string(self, text: str, memo: Optional[Dict[str, Any]] = None) -> Any:
         """
         Resolve placeholders in a string
 
@@ -76,7 +161,13 @@ class PlaceholderResolver:
         - {{step_id}} or ${step_id} - replaces with entire output
         - {{step_id.field}} or ${step_id.field} - replaces with specific field from output
         - {{step_id.field.nested}} - supports nested field access
+
+        Placeholder content cannot contain braces or span multiple lines.
         """
+        # Every placeholder syntax contains "{" - skip the regex for plain strings
+        if '{' not in text:
+            return text
+
         # Find all placeholders in the string
         matches = list(self.PLACEHOLDER_PATTERN.finditer(text))
 
@@ -87,29 +178,51 @@ class PlaceholderResolver:
         if len(matches) == 1 and matches[0].group(0) == text:
             # Extract placeholder content (from group 2 for {{}}, group 3 for ${}, or group 4 for {})
             placeholder = matches[0].group(2) or matches[0].group(3) or matches[0].group(4)
-            value = self._get_placeholder_value(placeholder)
+            value = self._lookup_placeholder(placeholder, memo)
             if value is not None:
-                print(f"[PlaceholderResolver] Resolved '{text}' -> {value}")
+                logger.debug("Resolved '%s' -> %s", text, value)
                 return value
             else:
-                print(f"[PlaceholderResolver] WARNING: Could not resolve placeholder '{text}'")
+                logger.warning("Could not resolve placeholder '%s'", text)
                 return text
 
-        # If there are multiple placeholders or mixed text, do string replacement
-        resolved_text = text
-        for match in reversed(matches):  # Process in reverse to maintain positions
+        # If there are multiple placeholders or mixed text, build the result in one pass:
+        # literal slices and resolved values are collected and joined once at the end
+        parts = []
+        append = parts.append
+        last_end = 0
+        changed = False
+        for match in matches:
+            append(text[last_end:match.start()])
             # Extract placeholder content (from group 2 for {{}}, group 3 for ${}, or group 4 for {})
             placeholder = match.group(2) or match.group(3) or match.group(4)
-            value = self._get_placeholder_value(placeholder)
+            value = self._lookup_placeholder(placeholder, memo)
             if value is not None:
                 # Convert value to string for insertion
                 str_value = str(value) if not isinstance(value, str) else value
-                resolved_text = resolved_text[:match.start()] + str_value + resolved_text[match.end():]
-                print(f"[PlaceholderResolver] Replaced '{match.group(0)}' with '{str_value}'")
+                append(str_value)
+                changed = True
+                logger.debug("Replaced '%s' with '%s'", match.group(0), str_value)
             else:
-                print(f"[PlaceholderResolver] WARNING: Could not resolve placeholder '{match.group(0)}'")
+                append(match.group(0))
+                logger.warning("Could not resolve placeholder '%s'", match.group(0))
+            last_end = match.end()
 
-        return resolved_text
+        if not changed:
+            return text
+
+        append(text[last_end:])
+        return "".join(parts)
+
+    def _lookup_placeholder(self, placeholder: str, memo: Optional[Dict[str, Any]]) -> Optional[Any]:
+        """Get a placeholder value, reusing the result already computed in this resolution"""
+        if memo is None:
+            return self._get_placeholder_value(placeholder)
+        value = memo.get(placeholder, _MISSING)
+        if value is _MISSING:
+            value = self._get_placeholder_value(placeholder)
+            memo[placeholder] = value
+        return value
 
     def _get_placeholder_value(self, placeholder: str) -> Optional[Any]:
         """
@@ -124,62 +237,153 @@ class PlaceholderResolver:
         Returns:
             The resolved value or None if not found
         """
-        # Normalize Python array indexing [N] to dot notation .N
-        # Convert: "step_1.events[0].id" -> "step_1.events.0.id"
-        normalized_placeholder = self._normalize_array_indexing(placeholder)
+        normalized_placeholder, parts = self._parse_placeholder(placeholder)
 
-        # Check if this is an expression (contains operators or brackets)
-        # Note: After normalization, brackets in expressions like [...] will still be present
-        if any(op in normalized_placeholder for op in ['+', '-', '*', '/', '[', '(', ',']):
+        if parts is None:
             return self._evaluate_expression(normalized_placeholder)
 
-        parts = normalized_placeholder.split('.')
         step_id = parts[0]
 
+        # Fast path: direct lookup in the flattened output
+        flat = self._flat_outputs.get(step_id)
+        if flat is not None:
+            value = flat.get(normalized_placeholder, _MISSING)
+            if value is not _MISSING:
+                logger.debug("Resolved '%s' = %s", normalized_placeholder, value)
+                return value
+
         # Check if step output exists
-        if step_id not in self._step_outputs:
-            print(f"[PlaceholderResolver] ERROR: Step '{step_id}' not found in registered outputs: {list(self._step_outputs.keys())}")
+        value = self._step_outputs.get(step_id, _MISSING)
+        if value is _MISSING:
+            logger.error("Step '%s' not found in registered outputs: %s", step_id, list(self._step_outputs))
             return None
 
-        value = self._step_outputs[step_id]
-        print(f"[PlaceholderResolver] Resolving '{normalized_placeholder}': Starting with step '{step_id}' = {type(value).__name__}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(
+                "Resolving '%s': Starting with step '%s' = %s",
+                normalized_placeholder, step_id, type(value).__name__
+            )
 
         # Navigate through nested fields
         current_path = step_id
         for i, part in enumerate(parts[1:], 1):
             prev_value = value
             if isinstance(value, dict):
-                if part in value:
-                    value = value[part]
+                child = value.get(part, _MISSING)
+                if child is not _MISSING:
+                    value = child
                     current_path += f".{part}"
-                    print(f"[PlaceholderResolver]   [{i}/{len(parts)-1}] {current_path} = {type(value).__name__}" +
-                          (f" (length {len(value)})" if isinstance(value, (list, dict)) else ""))
+                    if debug:
+                        self._log_path_step(i, len(parts) - 1, current_path, value)
                 else:
-                    available_keys = list(value.keys()) if isinstance(value, dict) else []
-                    print(f"[PlaceholderResolver] ERROR: Field '{part}' not found in dict at '{current_path}'. Available keys: {available_keys}")
+                    logger.error(
+                        "Field '%s' not found in dict at '%s'. Available keys: %s",
+                        part, current_path, list(value)
+                    )
                     return None
             elif isinstance(value, list):
                 # Support array indexing like events.0
-                try:
-                    index = int(part)
-                    if 0 <= index < len(value):
-                        value = value[index]
-                        current_path += f".{part}"
-                        print(f"[PlaceholderResolver]   [{i}/{len(parts)-1}] {current_path} = {type(value).__name__}" +
-                              (f" (length {len(value)})" if isinstance(value, (list, dict)) else ""))
-                    else:
-                        print(f"[PlaceholderResolver] ERROR: Index {index} out of range at '{current_path}'. List has {len(prev_value)} elements (valid indices: 0-{len(prev_value)-1})")
-                        return None
-                except ValueError:
-                    print(f"[PlaceholderResolver] ERROR: Invalid list index '{part}' at '{current_path}'. Expected integer, got '{part}'")
+                if not part.isdecimal():
+                    logger.error(
+                        "Invalid list index '%s' at '%s'. Expected integer, got '%s'", part, current_path, part
+                    )
+                    return None
+                index = int(part)
+                if index < len(value):
+                    value = value[index]
+                    current_path += f".{part}"
+                    if debug:
+                        self._log_path_step(i, len(parts) - 1, current_path, value)
+                else:
+                    logger.error(
+                        "Index %s out of range at '%s'. List has %s elements (valid indices: 0-%s)",
+                        index, current_path, len(prev_value), len(prev_value) - 1
+                    )
                     return None
             else:
-                print(f"[PlaceholderResolver] ERROR: Cannot access field '{part}' on {type(value).__name__} at '{current_path}'. Value is not a dict or list.")
+                logger.error(
+                    "Cannot access field '%s' on %s at '%s'. Value is not a dict or list.",
+                    part, type(value).__name__, current_path
+                )
                 return None
 
-        print(f"[PlaceholderResolver] ✓ Successfully resolved '{normalized_placeholder}' = {value}")
+        logger.debug("Resolved '%s' = %s", normalized_placeholder, value)
         return value
 
+    @staticmethod
+    def _log_path_step(index: int, total: int, path: str, value: Any) -> None:
+        """Log one step of walking a placeholder path"""
+        size = f" (length {len(value)})" if isinstance(value, (list, dict)) else ""
+        logger.debug("  [%s/%s] %s = %s%s", index, total, path, type(value).__name__, size)
+
+    def _flatten_output(self, step_id: str, output: Any) -> Optional[Dict[str, Any]]:
+        """
+        Flatten a step output into a dotted path -> value dict
+
+        Paths use the same dot notation as placeholders (list indices become ".N").
+        Dict keys that contain dots cannot be addressed by a placeholder and are skipped.
+
+        Args:
+            step_id: The step ID used as path prefix
+            output: The step's output
+
+        Returns:
+            The flattened dict, or None if the output has more than MAX_FLATTEN_NODES nodes
+        """
+        flat = {step_id: output}
+        stack = [(step_id, output)]
+        while stack:
+            path, value = stack.pop()
+            if isinstance(value, dict):
+                children = ((key, child) for key, child in value.items()
+                            if isinstance(key, str) and '.' not in key)
+            elif isinstance(value, list):
+                children = ((str(index), child) for index, child in enumerate(value))
+            else:
+                continue
+
+            for key, child in children:
+                if len(flat) >= self.MAX_FLATTEN_NODES:
+                    return None
+                child_path = f"{path}.{key}"
+                flat[child_path] = child
+                if isinstance(child, (dict, list)):
+                    stack.append((child_path, child))
+
+        return flat
+
+    def _parse_placeholder(self, placeholder: str) -> Tuple[str, Optional[Tuple[str, ...]]]:
+        """
+        Parse placeholder content once and cache the result
+
+        Args:
+            placeholder: The placeholder content (without {{ }})
+
+        Returns:
+            Tuple of (normalized placeholder, path parts), where path parts is None
+            if the placeholder is an expression
+        """
+        parsed = self._path_cache.get(placeholder)
+        if parsed is not None:
+            return parsed
+
+        # Normalize Python array indexing [N] to dot notation .N
+        # Convert: "step_1.events[0].id" -> "step_1.events.0.id"
+        normalized = self._normalize_array_indexing(placeholder)
+
+        # Check if this is an expression (contains operators or brackets)
+        # Note: After normalization, brackets in expressions like [...] will still be present
+        if any(op in normalized for op in ['+', '-', '*', '/', '[', '(', ',']):
+            parsed = (normalized, None)
+        else:
+            parts = normalized.split('.')
+            parts[0] = sys.intern(parts[0])
+            parsed = (normalized, tuple(parts))
+
+        self._path_cache[placeholder] = parsed
+        return parsed
+
     def _evaluate_expression(self, expression: str) -> Optional[Any]:
         """
         Safely evaluate a Python expression with access to step outputs
@@ -217,16 +421,16 @@ class PlaceholderResolver:
             # Replace step_id.field with step_id['field'] for dict access
             eval_expr = self._transform_expression(expression)
 
-            print(f"[PlaceholderResolver] Evaluating expression: {eval_expr}")
+            logger.debug("Evaluating expression: %s", eval_expr)
 
             # Evaluate with restricted built-ins for safety
             result = eval(eval_expr, {"__builtins__": {}}, namespace)
 
-            print(f"[PlaceholderResolver] Expression '{expression}' evaluated to: {result}")
+            logger.debug("Expression '%s' evaluated to: %s", expression, result)
             return result
 
         except Exception as e:
-            print(f"[PlaceholderResolver] Error evaluating expression '{expression}': {e}")
+            logger.warning("Error evaluating expression '%s': %s", expression, e)
             return None
 
     def _create_smart_dict(self, original: dict, wrapped_data: dict) -> dict:
@@ -343,15 +547,18 @@ class PlaceholderResolver:
         """
         # Replace [N] with .N using regex
         # Pattern: [\d+] (bracket with digits inside)
-        import re
-        normalized = re.sub(r'\[(\d+)\]', r'.\1', placeholder)
+        if '[' not in placeholder:
+            return placeholder
+        normalized = self.ARRAY_INDEX_PATTERN.sub(r'.\1', placeholder)
 
         if normalized != placeholder:
-            print(f"[PlaceholderResolver] Normalized array indexing: '{placeholder}' -> '{normalized}'")
+            logger.debug("Normalized array indexing: '%s' -> '%s'", placeholder, normalized)
 
         return normalized
 
     def clear(self) -> None:
         """Clear all registered step outputs"""
         self._step_outputs.clear()
-        print("[PlaceholderResolver] Cleared all step outputs")
+        self._flat_outputs.clear()
+        self._path_cache.clear()
+        logger.debug("Cleared all step outputs")
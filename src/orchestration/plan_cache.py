@@ -0,0 +1,223 @@
+"""
+Plan Cache - Reuses LLM planning responses for repeated or near-identical requests
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+from collections import Counter, OrderedDict
+from typing import Optional
+
+# Word tokens used for request similarity (works for both Korean and English)
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+# Filler words that may differ between two requests without changing the plan.
+# Words carrying direction or ownership ("to", "for", "from", "me", "my") are
+# deliberately not filler: they are part of the salient sequence.
+STOPWORDS = frozenset({
+    "a", "an", "the", "please", "pls", "kindly", "can", "could", "would", "will",
+    "you", "i", "want", "need", "just", "hey", "hi",
+})
+
+# Requests mentioning these depend on the current time and are never served from cache.
+# Scopes only include the date, so relative times ("in 2 hours", "this afternoon") are
+# volatile too: a plan resolves them to absolute times that go stale within the day.
+VOLATILE_TERMS = frozenset({
+    "now", "current", "currently", "latest", "recent", "recently",
+    "hour", "hours", "hr", "hrs", "minute", "minutes", "min", "mins", "second", "seconds",
+    "morning", "afternoon", "evening", "tonight", "noon", "midnight", "later", "soon", "ago",
+    "지금", "현재", "최근", "방금",
+})
+
+# Korean time words take attached numbers and particles ("1시간 후에", "오후에"),
+# so they are matched in the text instead of as tokens
+_KO_VOLATILE_PATTERN = re.compile(
+    r"(?:시간|분|초)\s*(?:후|뒤|전|이내|안에)|오전|오후|아침|점심|저녁|오늘\s*밤|이따|잠시\s*후|나중에"
+    r"|지금|현재|최근|방금"
+)
+
+
+def _tokenize(text: str) -> list[str]:
+    """Lowercase word tokens of a request"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _salient(tokens: list[str]) -> tuple[str, ...]:
+    """Non-filler tokens of a request, in order"""
+    return tuple(token for token in tokens if token not in STOPWORDS)
+
+
+class PlanCache:
+    """
+    Cache of LLM planning responses, optionally persisted to SQLite
+
+    Entries are looked up in two tiers:
+    - Exact: normalized request text within the same scope (tools, date, ...)
+    - Similar: cosine similarity of token counts above a threshold. A similar entry
+      is only reused when both requests contain exactly the same non-filler tokens
+      in the same order, so a plan is never reused for a different name, date or
+      email address, nor when arguments are swapped ("from Monday to Tuesday" vs
+      "from Tuesday to Monday"). Disabled with similarity_threshold=None.
+
+    The least recently used entry is evicted when the cache is full. With a db_path,
+    entries are written through to SQLite and the most recent ones are loaded on
+    startup; lookups are always served from memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        similarity_threshold: Optional[float] = 0.92,
+        db_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.db_path = db_path
+        # key -> (scope, salient tokens, token counts, cached response), least recently used first
+        self._entries: OrderedDict[str, tuple[str, tuple[str, ...], Counter[str], str]] = OrderedDict()
+        # Lookup counters for monitoring the hit rate
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        if db_path:
+            self._initialize_database(db_path)
+            self._load(db_path)
+
+    @staticmethod
+    def _entry(scope: str, request_text: str, response: str) -> tuple[str, tuple[str, ...], Counter[str], str]:
+        """Build a cache entry for a request"""
+        tokens = _tokenize(request_text)
+        return (scope, _salient(tokens), Counter(tokens), response)
+
+    @staticmethod
+    def _initialize_database(db_path: str) -> None:
+        """Create the plan cache table"""
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS plan_cache (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    request_text TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.commit()
+
+    def _load(self, db_path: str) -> None:
+        """Load the most recent persisted entries, oldest first"""
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute(
+                "SELECT key, scope, request_text, response FROM plan_cache ORDER BY rowid DESC LIMIT ?",
+                (self.max_entries,)
+            ).fetchall()
+        for key, scope, request_text, response in reversed(rows):
+            self._entries[key] = self._entry(scope, request_text, response)
+
+    @staticmethod
+    def make_scope(*parts: str) -> str:
+        """Build a scope fingerprint; entries only match within the same scope"""
+        return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def is_cacheable(request_text: str) -> bool:
+        """Check whether a request can be served from cache"""
+        tokens = _tokenize(request_text)
+        return (
+            bool(tokens)
+            and not VOLATILE_TERMS.intersection(tokens)
+            and not _KO_VOLATILE_PATTERN.search(request_text)
+        )
+
+    def _key(self, scope: str, request_text: str) -> str:
+        normalized = " ".join(_tokenize(request_text))
+        return hashlib.blake2b(f"{scope}\x1f{normalized}".encode(), digest_size=16).hexdigest()
+
+    def get(self, scope: str, request_text: str) -> Optional[str]:
+        """
+        Get a cached response for a request
+
+        Args:
+            scope: Scope fingerprint from make_scope()
+            request_text: The user request
+
+        Returns:
+            The cached response or None on miss
+        """
+        # Exact tier: one dict lookup; the similarity scan only runs on a miss
+        key = self._key(scope, request_text)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry[3]
+        if self.similarity_threshold is None:
+            self.misses += 1
+            return None
+
+        _, salient, tokens, _ = self._entry(scope, request_text, "")
+        best_score = 0.0
+        best_key = None
+        for entry_key, (entry_scope, entry_salient, entry_tokens, _) in self._entries.items():
+            if entry_scope != scope or entry_salient != salient:
+                continue
+            score = self._cosine(tokens, entry_tokens)
+            if score > best_score:
+                best_score = score
+                best_key = entry_key
+
+        if best_key is not None and best_score >= self.similarity_threshold:
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            return self._entries[best_key][3]
+        self.misses += 1
+        return None
+
+    def put(self, scope: str, request_text: str, response: str) -> None:
+        """
+        Store a response for a request
+
+        Args:
+            scope: Scope fingerprint from make_scope()
+            request_text: The user request
+            response: The LLM response to reuse
+        """
+        key = self._key(scope, request_text)
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            # Evict the least recently used entry
+            self._entries.popitem(last=False)
+        self._entries[key] = self._entry(scope, request_text, response)
+        self._entries.move_to_end(key)
+
+        if self.db_path:
+            with sqlite3.connect(self.db_path) as conn:
+                # REPLACE gets a new rowid, so rowid order stays insertion order
+                conn.execute(
+                    "INSERT OR REPLACE INTO plan_cache (key, scope, request_text, response) VALUES (?, ?, ?, ?)",
+                    (key, scope, request_text, response)
+                )
+                conn.execute(
+                    "DELETE FROM plan_cache WHERE rowid NOT IN "
+                    "(SELECT rowid FROM plan_cache ORDER BY rowid DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+                conn.commit()
+
+    def clear(self) -> None:
+        """Remove all cached entries"""
+        self._entries.clear()
+        if self.db_path:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM plan_cache")
+                conn.commit()
+
+    @staticmethod
+    def _cosine(a: Counter[str], b: Counter[str]) -> float:
+        """Cosine similarity of two token count vectors"""
+        dot = sum(count * b[token] for token, count in a.items() if token in b)
+        if not dot:
+            return 0.0
+        norm_a = math.sqrt(sum(count * count for count in a.values()))
+        norm_b = math.sqrt(sum(count * count for count in b.values()))
+        return dot / (norm_a * norm_b)
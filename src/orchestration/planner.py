@@ -2,12 +2,20 @@
 Planner - Plans task execution using LLM
 """
 
+import asyncio
+import hashlib
 import json
+import logging
 import re
+import sys
+import time
 import uuid
 import os
+from contextlib import aclosing
 from datetime import datetime
-from typing import Optional, Any, List
+from collections import Counter
+from functools import lru_cache
+from typing import Optional, Any, AsyncIterator, List
 from anthropic import Anthropic
 
 from .types import (
@@ -22,96 +30,112 @@ from .types import (
     AggregatedGroupResults,
     PlanState
 )
-from .llm_client import create_llm_client, LLMClient
+from .llm_client import create_llm_client, stream_with_idle_timeout, CachedLLMClient, LLMClient
 from .validators import extract_missing_params
 from .event_emitter import get_event_emitter
+from .plan_cache import PlanCache
+from .json_stream import JsonArrayStream, JsonFieldStream
+from .json_utils import fast_loads, fast_dumps, dumps_indent
 
 # Forward declaration to avoid circular import
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .tracker import TaskTracker
 
+logger = logging.getLogger(__name__)
 
-class Planner:
-    """Planner - Uses LLM to create execution plans"""
 
-    def __init__(self, settings: OrchestrationSettings, tracker: Optional['TaskTracker'] = None):
-        self.settings = settings
-        self.tracker = tracker
-        self.event_emitter = get_event_emitter()
+# Seconds a streamed LLM response may stall before it is aborted
+_STREAM_IDLE_TIMEOUT = 30.0
 
-        # Determine LLM provider
-        llm_provider = os.getenv("LLM_PROVIDER", "anthropic")
+# Keys every step of a planning response must have
+_REQUIRED_STEP_KEYS = frozenset({"tool_name", "input", "description"})
 
-        # Create LLM client
-        self.llm_client: LLMClient = create_llm_client(
-            api_key=settings.llm_api_key,
-            model=settings.llm_model,
-            provider=llm_provider,
-            base_url=settings.llm_base_url
-        )
+# Output token caps. A decision is mostly a short JSON object whose final message grows
+# with the number of steps; a response cut off at a smaller cap is retried with the full one.
+_MAX_OUTPUT_TOKENS = 4096
+_DECISION_BASE_TOKENS = 1024
+_DECISION_TOKENS_PER_STEP = 256
 
-        print(f"[Planner] Using {llm_provider} with model {settings.llm_model}")
 
-    async def invoke(self, state: State) -> State:
-        """
-        Invoke planner - decides next action based on state
-        """
-        if state.type == StateType.PLAN_OR_DECIDE:
-            # Initial planning
-            if not state.plan:
-                return await self._create_initial_plan(state)
-            # Decide next steps based on results
-            else:
-                return await self._decide_next(state)
-        else:
-            # Pass through if not in planning state
-            return state
+# Requests that only ask which tools are available; matched against the whole request,
+# so requests that merely mention tools still go to the LLM
+_KO_TOOL_LIST_ENDING = (
+    r"(?:이|가|을|를|들이|들을|들)?\s*"
+    r"(?:있어|있어요|있나요|있니|있습니까|뭐야|뭐예요|알려\s*줘|알려\s*주세요|보여\s*줘|보여\s*주세요)?"
+)
+_TOOL_LIST_RE = re.compile(
+    r"\s*(?:please\s+)?(?:"
+    r"(?:what|which)\s+(?:tools|capabilities)\s+(?:do|can)\s+you\s+(?:have|use|offer)"
+    r"|(?:what|which)\s+tools\s+are\s+(?:there|available)"
+    r"|what\s+are\s+(?:your|the\s+available)\s+(?:tools|capabilities)"
+    r"|(?:list|show)(?:\s+me)?(?:\s+(?:all|your|the|available))*\s+(?:tools|capabilities)"
+    r"|what\s+can\s+you\s+do"
+    r"|(?:사용\s*가능한|어떤|무슨)\s*(?:도구|툴|기능)" + _KO_TOOL_LIST_ENDING +
+    r"|(?:도구|툴)\s*목록" + _KO_TOOL_LIST_ENDING +
+    r"|(?:뭘|뭐|무엇을)\s*할\s*수\s*있(?:어|어요|나요|니|습니까)?"
+    r")\s*[?.!]*\s*",
+    re.IGNORECASE
+)
 
-    async def _create_initial_plan(self, state: State) -> State:
-        """Create initial execution plan from user request"""
 
-        # Build prompt for LLM
-        tools_description = self._format_tools_for_prompt()
-        tools_list_detailed = self._format_tools_detailed()
-        context_str = self._format_context(state.context)
+# Markdown code fence; the payload ends at the closing fence or end of text
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*(?:```|\Z)", re.DOTALL | re.IGNORECASE)
 
-        # Get recent execution results from previous plans (loaded by Orchestrator in state.context)
-        recent_results_str = await self._format_recent_execution_results(state.context)
 
-        # Get current date and time
-        current_datetime = datetime.now()
-        today_str = current_datetime.strftime("%Y-%m-%d (%A)")
-        current_time_str = current_datetime.strftime("%H:%M:%S")
+def _strip_fence(content: str) -> str:
+    """
+    Remove a markdown code fence wrapping an LLM response
 
-        prompt = f"""You are an AI assistant that creates execution plans.
+    Args:
+        content: Raw LLM response, possibly with text before the fence
 
-IMPORTANT CONTEXT:
-- Today's date: {today_str}
-- Current time: {current_time_str}
-- When interpreting time references (e.g., "this week", "next week", "tomorrow", "last week"), use today's date as the reference point.
+    Returns:
+        The fenced payload, or the stripped content if it is not fenced
+    """
+    content = content.strip()
+    if content[:1] in ("{", "["):
+        # Bare JSON; backticks inside its strings are not a fence
+        return content
+    match = _FENCE_RE.search(content)
+    return match.group(1) if match else content
 
-Available tools (you MUST use these exact tool names):
-{tools_list_detailed}
 
-User request: {state.request_text}
+# Placeholders in step inputs: {{...}}, ${...} or {...}; only presence is checked
+_PLACEHOLDER_RE = re.compile(r"\{\{[^}]+\}\}|\$\{[^}]+\}|\{[^}]+\}")
+
+
+# Plain field references to step outputs, e.g. {{step_0.event.id}}. Numeric (array
+# index) segments are excluded: the LLM picks the item matching the step description.
+_STEP_REF_RE = re.compile(r"\{\{\s*(step_\d+)((?:\.(?!\d)\w+)*)\s*\}\}")
+
+# Marks a value that can't be resolved without the LLM
+_UNRESOLVED = object()
 
-Context:
-{context_str}
 
-{recent_results_str if recent_results_str else ""}
+# Failure classes recognized in step errors; the group index identifies the class
+_ERROR_CLASSIFIER = re.compile(r"(Email validation failed)|(No MCP server found for tool)")
+_ERR_EMAIL_VALIDATION = 1
+_ERR_NO_MCP_SERVER = 2
 
-CRITICAL: You MUST use ONLY the exact tool names listed above. DO NOT create variations or guess tool names (e.g., if the tool is "update_event", do NOT use "update_calendar_event").
+
+# Prompt templates. The static instructions are sent as the system prompt together with
+# the tool definitions, so the provider caches them as one prefix and only the short
+# per-call part is processed anew. ${name} placeholders are split out by _split_template,
+# so the JSON braces need no escaping.
+_PLAN_INSTRUCTIONS = """You are an AI assistant that creates execution plans.
+
+CRITICAL: You MUST use ONLY the exact tool names from the system prompt. DO NOT create variations or guess tool names (e.g., if the tool is "update_event", do NOT use "update_calendar_event").
 
 IMPORTANT: If the user is asking about what tools you have, what you can do, or requesting a list of available capabilities, you should provide the list of available tools instead of creating an execution plan.
 
 For tool listing requests, return a JSON response in this format:
-{{
+{
   "type": "tool_list_request",
   "tools": [
-{tools_list_detailed}
+    // The tool definitions from the system prompt
   ]
-}}
+}
 
 Otherwise, create a step-by-step execution plan to fulfill the user's request.
 For each step, specify:
@@ -121,21 +145,21 @@ For each step, specify:
 4. dependencies: which previous step IDs this depends on (empty list if none)
 
 PLACEHOLDER SYNTAX FOR REFERENCING PREVIOUS STEPS:
-IMPORTANT: Always use DOUBLE curly braces {{{{ }}}} for placeholders!
+IMPORTANT: Always use DOUBLE curly braces {{ }} for placeholders!
 
-- To reference a previous step's entire output: use {{{{step_N}}}} or {{{{step_N.result}}}}
-  Example: {{"numbers": [{{{{step_0.result}}}}, 150]}}
+- To reference a previous step's entire output: use {{step_N}} or {{step_N.result}}
+  Example: {"numbers": [{{step_0.result}}, 150]}
   NOTE: Steps are 0-indexed (step_0 is the first step, step_1 is the second, etc.)
 
-- To reference a specific field: use {{{{step_N.field_name}}}}
-  Example: {{"event_id": {{{{step_0.id}}}}}}
+- To reference a specific field: use {{step_N.field_name}}
+  Example: {"event_id": {{step_0.id}}}
 
-- To access nested fields: use {{{{step_N.field.nested_field}}}}
-  Example: {{"title": {{{{step_0.event.title}}}}}}
+- To access nested fields: use {{step_N.field.nested_field}}
+  Example: {"title": {{step_0.event.title}}}
 
-- To access array elements: use {{{{step_N.array_field.INDEX}}}} (dot notation)
-  Example: {{"event_id": {{{{step_0.events.0.id}}}}}}
-  Example: {{"recipient": {{{{step_1.events.0.attendees.0}}}}}}
+- To access array elements: use {{step_N.array_field.INDEX}} (dot notation)
+  Example: {"event_id": {{step_0.events.0.id}}}
+  Example: {"recipient": {{step_1.events.0.attendees.0}}}
   NOTE: Array indices use dot notation (events.0.id) NOT bracket notation (events[0].id)
 
 IMPORTANT: FILTERING AND SEARCHING IN ARRAYS
@@ -143,8 +167,8 @@ IMPORTANT: FILTERING AND SEARCHING IN ARRAYS
 - Instead, describe what you're looking for using a descriptive placeholder
 - The system will resolve it intelligently based on the actual data
 - Examples:
-  * BAD:  {{"event_id": {{{{step_0.events.0.id}}}}}}  // Always picks first event
-  * GOOD: {{"event_id": "{{{{event_id_where_title_is_Project_Review}}}}"}}  // Describes what to find
+  * BAD:  {"event_id": {{step_0.events.0.id}}}  // Always picks first event
+  * GOOD: {"event_id": "{{event_id_where_title_is_Project_Review}}"}  // Describes what to find
   * GOOD: Use a descriptive placeholder that indicates filtering criteria
 - If you need to find a specific item, create a placeholder that describes the search condition
 
@@ -161,7 +185,7 @@ CRITICAL RULES FOR EMAIL ADDRESSES AND CONTACT INFORMATION:
   * Then use the retrieved email address in subsequent steps (e.g., send_email)
   * Example plan for "send email to 김민지":
     Step 0: lookup_contact with query="김민지"
-    Step 1: send_email with to="{{{{step_0.contact.email}}}}"
+    Step 1: send_email with to="{{step_0.contact.email}}"
 - Contact lookup tool available:
   * "lookup_contact" - Universal contact lookup by name (Korean/English) or email address
     - Returns full contact info including: name, name_en, email, phone, department, position
@@ -171,10 +195,10 @@ CRITICAL RULES FOR EMAIL ADDRESSES AND CONTACT INFORMATION:
   * Were explicitly provided by the user in their request
   * Are available in the provided context
   * Are retrieved from the lookup_contact tool
-- If contact lookup fails and you don't have a valid email address, use a template variable placeholder like "{{"recipient_email"}}" and the system will ask the user
+- If contact lookup fails and you don't have a valid email address, use a template variable placeholder like "{"recipient_email"}" and the system will ask the user
 
 CRITICAL RULES FOR REUSING PREVIOUS EXECUTION RESULTS:
-- ALWAYS check the "Recent execution results" section above for data from previous requests
+- ALWAYS check the "Recent execution results" section of the request for data from previous requests
 - If the current user request requires data that was ALREADY retrieved in a recent execution:
   * DO NOT create a new step to fetch the same data again
   * Instead, assume the data is available from the recent execution
@@ -203,187 +227,854 @@ CRITICAL - HANDLING POTENTIALLY EMPTY RESULTS:
   * The decision phase will handle empty results and decide whether to skip dependent steps
 
 Return your plan as a JSON array of steps. Each step should have this format:
-{{
+{
   "tool_name": "tool_name",
-  "input": {{"param": "value"}},
+  "input": {"param": "value"},
   "description": "description of this step",
   "dependencies": []
-}}
+}
 
 Return ONLY the JSON (either tool list or execution plan), no other text.
 """
 
+_INITIAL_PROMPT = """IMPORTANT CONTEXT:
+- Today's date: ${today_str}
+- Current time: ${current_time_str}
+- When interpreting time references (e.g., "this week", "next week", "tomorrow", "last week"), use today's date as the reference point.
+
+Available tools: the tool definitions in the system prompt (you MUST use these exact tool names).
+
+User request: ${request_text}
+
+Context:
+${context_str}
+
+${recent_results_str}
+"""
+
+_DECISION_INSTRUCTIONS = """You are an AI assistant making STEP-BY-STEP decisions about task execution.
+
+IMPORTANT: All planned steps have been executed. Now you need to decide if the task is complete or if additional steps are needed.
+
+CRITICAL: You MUST use ONLY the exact tool names from the system prompt. DO NOT create variations or guess tool names.
+
+ANALYZING STEP RESULTS:
+- Look at the actual data returned by each completed step
+- If a step returned a list of items (e.g., calendar events), you can:
+  * Check if the desired item exists in the list
+  * Create a new step to process specific items based on their properties
+  * Use the actual IDs, titles, or other fields from the results
+- You do NOT need to rely only on placeholder syntax like {{step_0.events.0.id}}
+- Instead, you can examine the step output and create intelligent next steps
+
+CRITICAL - HANDLING EMPTY OR NULL RESULTS:
+- ALWAYS check if previous step results are empty, null, or contain no data
+- If a step returned an empty list [], null, or no items:
+  * DO NOT create follow-up steps that depend on that data
+  * DO NOT use empty values as input to subsequent steps (e.g., don't pass "" to search queries)
+  * Instead, either:
+    a) Skip the dependent steps and mark task as complete with appropriate message
+    b) Return "needsHuman" if user input is needed to proceed
+    c) Adjust the plan to handle the empty case gracefully
+- Examples:
+  * If list_events returns no events, DON'T create a search_issues step with empty meeting summary
+  * If search_issues returns no issues, DON'T try to process non-existent issue data
+  * If a required item is not found, DON'T proceed with placeholder or empty values
+
+DECISION OPTIONS:
+1. "final" - Task is complete, return final response to user
+2. "nextSteps" - More steps needed based on the results you analyzed
+   - Create new steps dynamically using the actual data from previous steps
+   - You can reference specific values you found in the step outputs
+   - Each new step should have: tool_name, input, description, dependencies
+3. "needsHuman" - Requires human intervention (missing info, ambiguous results, etc.)
+4. "failed" - Task failed and cannot continue
+
+PLACEHOLDER SYNTAX FOR NEXT STEPS (when needed):
+- To reference previous step output: {{step_N}} or {{step_N.field_name}}
+- To access array elements: {{step_N.array.0.id}} (use dot notation)
+- NOTE: Steps are 0-indexed (step_0 is first step, step_1 is second, etc.)
+- But prefer using actual values from the results when possible!
+
+Return your decision as JSON:
+{
+  "type": "final|nextSteps|needsHuman|failed",
+  "reason": "explanation of your analysis and decision",
+  "payload": {
+    // For "final": {"message": "success message to user", "data": <optional result data>}
+    // For "nextSteps": {"steps": [
+    //   {
+    //     "tool_name": "tool_name",
+    //     "input": {"param": "value or {{placeholder}}"},
+    //     "description": "what this step does",
+    //     "dependencies": [0, 1]  // indices of steps this depends on
+    //   }
+    // ]}
+    // For "needsHuman": {"question": "what to ask the user"}
+    // For "failed": {"error": "error description"}
+  }
+}
+
+Return ONLY the JSON, no other text.
+"""
+
+_DECISION_PROMPT = """IMPORTANT CONTEXT:
+- Today's date: ${today_str}
+- Current time: ${current_time_str}
+- When interpreting time references (e.g., "this week", "next week", "tomorrow", "last week"), use today's date as the reference point.
+
+Original request: ${request_text}
+
+Context:
+${context_str}
+
+Available tools: the tool definitions in the system prompt (you MUST use these exact tool names).
+
+Execution results (all steps have been executed):
+${results_summary}
+"""
+
+
+# Static parts of the placeholder resolution prompt
+_RESOLUTION_HEADER = """You are helping resolve placeholders in a task execution step.
+
+MOST RECENT STEP EXECUTED:
+"""
+
+_RESOLUTION_TASK = """
+
+YOUR TASK:
+1. Analyze the output from previous steps (especially the most recent one)
+2. Read the NEXT STEP's description carefully to understand what specific item is needed
+3. Search through arrays intelligently based on the description and user's original intent
+4. Return the resolved input for """
+
+_RESOLUTION_INSTRUCTIONS = """
+
+CRITICAL INSTRUCTIONS FOR ARRAY PLACEHOLDERS:
+- When you see {{step_X.array.0.field}}, DO NOT always pick index 0
+- Instead, analyze the step description and previous context to find the RIGHT item
+- Example: If step description is "Update Project Review event" and step_0 returned:
+  * events: [{"id": "event_1", "title": "Team Meeting"}, {"id": "event_2", "title": "Project Review"}]
+  * The placeholder {{step_0.events.0.id}} should resolve to "event_2" (not "event_1")
+  * Because the description mentions "Project Review"
+
+IMPORTANT:
+- If a placeholder describes a filter or search (e.g., "event where title='X'"), find the matching item
+- Use the step description as a guide for which item to select from arrays
+- Extract the exact field value requested (e.g., if placeholder asks for "id", return just the id)
+- Preserve all non-placeholder values as-is
+- If you cannot resolve a placeholder, keep it as-is and explain in reasoning
+
+Return ONLY valid JSON in this format:
+{
+  "resolved_input": {
+    // The complete input dict with all placeholders resolved
+    // Example: {"event_id": "event_2", "updates": {"end": "2024-03-20T16:00:00"}}
+  },
+  "reasoning": "Brief explanation of how you resolved the placeholders"
+}
+
+Return ONLY the JSON, no other text."""
+
+
+# Prompt budgets: the decision prompt lists at most this many completed steps, and
+# step outputs and conversation messages are cut to these lengths
+_MAX_RESULT_STEPS = 20
+_MAX_OUTPUT_CHARS = 2000
+_MAX_MESSAGE_CHARS = 1000
+
+
+def _truncate(text: str, limit: int) -> str:
+    """
+    Cut text to a prompt budget, noting how much was left out
+
+    Args:
+        text: Text to cut
+        limit: Maximum number of characters kept
+
+    Returns:
+        The text, or its first limit characters followed by an omission note
+    """
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text) - limit} more chars)"
+
+
+@lru_cache(maxsize=64)
+def _format_context_lines(history: tuple[str, ...], other_context: tuple[tuple[str, str], ...]) -> str:
+    """
+    Format context for prompt from hashable parts
+
+    Args:
+        history: Last conversation messages
+        other_context: (key, value) pairs of additional context
+
+    Returns:
+        Formatted context string
+    """
+    lines = []
+    if history:
+        lines.append("Conversation history:")
+        for msg in history:
+            lines.append(f"  - {_truncate(msg, _MAX_MESSAGE_CHARS)}")
+
+    if other_context:
+        lines.append("Additional context:")
+        for key, value in other_context:
+            lines.append(f"  - {key}: {value}")
+
+    return "\n".join(lines) if lines else "No additional context"
+
+
+def _new_plan_id() -> str:
+    """
+    Generate a plan id
+
+    Plan ids are saved with the chat history and referenced by later requests,
+    so they must stay unique across processes and restarts. A per-process counter
+    would avoid the urandom read but collide after a restart; uuid4 hex is 32 chars
+    without hyphens.
+
+    Returns:
+        Random 32-character hex id
+    """
+    return uuid.uuid4().hex
+
+
+# Interned ids of the first steps: step ids are dict keys and compared throughout a plan
+_STEP_IDS = tuple(sys.intern(f"step_{i}") for i in range(256))
+
+
+def _step_id(index: int) -> str:
+    """
+    Get the step id of a 0-based step index
+
+    Args:
+        index: Step index (0 means step_0)
+
+    Returns:
+        The interned step id; the first 256 are looked up without formatting
+    """
+    if 0 <= index < len(_STEP_IDS):
+        return _STEP_IDS[index]
+    return sys.intern(f"step_{index}")
+
+
+def _build_step(
+    step_id: Any, tool_name: Any, step_input: Any, description: Any, dependencies: Any
+) -> Step:
+    """
+    Create a step from parsed LLM output
+
+    Parsed JSON almost always has the right types already, so the step is built
+    without re-validating (and copying) its fields; anything else is validated.
+    The step id and dependencies are checked too: a retried step's id comes from
+    the LLM, and a non-string id would silently miss every completed/failed id lookup.
+
+    Args:
+        step_id: Assigned step ID, or the ID the LLM gave a retried step
+        tool_name: Tool name from the response
+        step_input: Tool input from the response
+        description: Step description from the response
+        dependencies: Normalized dependency step IDs
+
+    Returns:
+        The step
+
+    Raises:
+        pydantic.ValidationError: If a field has an unusable type
+    """
+    if (
+        type(step_id) is str and type(tool_name) is str and type(step_input) is dict
+        and type(description) is str and type(dependencies) is list
+        and all(type(dep) is str for dep in dependencies)
+    ):
+        return Step.model_construct(
+            step_id=step_id,
+            tool_name=tool_name,
+            input=step_input,
+            description=description,
+            dependencies=dependencies
+        )
+    return Step(
+        step_id=step_id,
+        tool_name=tool_name,
+        input=step_input,
+        description=description,
+        dependencies=dependencies
+    )
+
+
+def _dependency_step_id(dep: Any) -> Optional[str]:
+    """
+    Convert one dependency from an LLM plan to a step id
+
+    Args:
+        dep: Step id string or 0-based step index (0 means step_0)
+
+    Returns:
+        Step id, or None for unsupported types
+    """
+    if isinstance(dep, str):
+        return dep
+    if isinstance(dep, int):
+        return _step_id(dep)
+    return None
+
+
+def _split_template(template: str, *names: str) -> tuple[str, ...]:
+    """
+    Split a prompt template at its placeholders so prompts can be built with one join
+
+    Args:
+        template: Template text with ${name} placeholders
+        *names: Placeholder names in the order they appear
+
+    Returns:
+        The len(names) + 1 literal fragments around the placeholders
+    """
+    fragments = []
+    rest = template
+    for name in names:
+        head, found, rest = rest.partition("${%s}" % name)
+        if not found:
+            raise ValueError(f"Placeholder {name} not found in template")
+        fragments.append(head)
+    fragments.append(rest)
+    return tuple(fragments)
+
+
+# Process-wide state shared by every Planner (one per user), kept for the process lifetime.
+# Formatted tool catalogs keyed by tool signature; cleared when it reaches 8 entries
+_tools_fmt_cache: dict[tuple, tuple[str, str]] = {}
+
+# Connection warmups keyed by (provider, base_url), like the HTTP pools they warm up
+_warmup_tasks: dict[tuple, asyncio.Task] = {}
+
+
+class Planner:
+    """Planner - Uses LLM to create execution plans"""
+
+    # Templates split once at import and shared by all planner instances
+    _INITIAL_PARTS = _split_template(
+        _INITIAL_PROMPT, "today_str", "current_time_str", "request_text", "context_str", "recent_results_str"
+    )
+    # The decision header (up to the results) is cached per plan
+    _DECISION_PARTS = _split_template(
+        _DECISION_PROMPT, "today_str", "current_time_str", "request_text", "context_str", "results_summary"
+    )
+    _DECISION_FOOTER = _DECISION_PARTS[5]
+
+    def __init__(self, settings: OrchestrationSettings, tracker: Optional['TaskTracker'] = None):
+        self.settings = settings
+        self.tracker = tracker
+        self.event_emitter = get_event_emitter()
+
+        # Determine LLM provider
+        llm_provider = os.getenv("LLM_PROVIDER", "anthropic")
+
+        # Create LLM client; identical plan generation requests reuse responses
+        self.llm_client: LLMClient = CachedLLMClient(create_llm_client(
+            api_key=settings.llm_api_key,
+            model=settings.llm_model,
+            provider=llm_provider,
+            base_url=settings.llm_base_url,
+            latency_mode=os.getenv("LLM_LATENCY_MODE", "standard")
+        ))
+        self._schedule_warmup((llm_provider, settings.llm_base_url))
+
+        # (monotonic timestamp, today_str, current_time_str) reused within one second
+        self._dt_cache: Optional[tuple[float, str, str]] = None
+
+        # plan_id -> (header key, head, tail) of the decision prompt
+        self._decision_header_cache: dict[str, tuple[tuple, str, str]] = {}
+
+        # (context, recent_results, recent_request, formatted) of the last call. The
+        # objects themselves are kept so their identities can't be reused by new ones.
+        self._recent_results_cache: Optional[tuple[ContextBundle, Any, Any, str]] = None
+
+        # plan_id -> (completed step ids, formatted results) for incremental formatting
+        self._step_results_cache: dict[str, tuple[tuple[str, ...], str]] = {}
+
+        # Cache LLM planning responses for repeated requests
+        self.plan_cache = PlanCache(db_path=settings.plan_cache_path if settings.plan_cache_enabled else None)
+        # Final answers are only replayed for the exact request, never a paraphrase
+        self.decision_cache = PlanCache(similarity_threshold=None)
+        # Tool listings depend only on the tools, not on the date or recent results
+        self.tool_list_cache = PlanCache()
+
+        # Tools rarely change, so their prompt text is formatted once (see invalidate_tools_cache)
+        self._load_tools()
+
+        logger.info("Using %s with model %s", llm_provider, settings.llm_model)
+
+    def _schedule_warmup(self, key: tuple) -> None:
+        """
+        Open the provider connection in the background so the first request skips the TLS handshake
+
+        Args:
+            key: (provider, base_url); each endpoint is warmed up once per process
+        """
+        if key in _warmup_tasks:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Created outside the event loop; the first request connects instead
+            return
+        _warmup_tasks[key] = loop.create_task(self._warmup())
+
+    async def _warmup(self) -> None:
+        """Warm up the LLM client, ignoring failures the first request will report"""
+        try:
+            await self.llm_client.warmup()
+        except Exception as e:
+            logger.debug("LLM connection warmup failed: %s", e)
+
+    async def invoke(self, state: State) -> State:
+        """
+        Invoke planner - decides next action based on state
+        """
+        if state.type == StateType.PLAN_OR_DECIDE:
+            # Initial planning
+            if not state.plan:
+                return await self._create_initial_plan(state)
+            # Decide next steps based on results
+            else:
+                return await self._decide_next(state)
+        else:
+            # Pass through if not in planning state
+            return state
+
+    async def invoke_many(self, states: list[State]) -> list[State]:
+        """
+        Invoke the planner for several independent states concurrently
+
+        Their LLM calls overlap instead of running one after another. Each state
+        must belong to a different request; the states of one request are sequential.
+
+        Args:
+            states: States of independent requests
+
+        Returns:
+            Updated states, in the same order
+        """
+        return list(await asyncio.gather(*(self.invoke(state) for state in states)))
+
+    async def _create_initial_plan(self, state: State) -> State:
+        """Create initial execution plan from user request"""
+
+        # Nothing to plan; fail before formatting any context
+        if not state.request_text or state.request_text.isspace():
+            logger.warning("Empty request, skipping planning")
+            state.type = StateType.ERROR
+            state.error = "Planning failed: Empty request"
+            return state
+
+        # Tool listings are static; answer them without the LLM
+        if _TOOL_LIST_RE.fullmatch(state.request_text):
+            logger.info("Detected tool list request")
+            return self._answer_tool_list_request(state)
+
+        # Build prompt for LLM
+        context_str = self._format_context(state.context)
+
+        # Get recent execution results from previous plans (loaded by Orchestrator in state.context)
+        recent_results_str = await self._format_recent_execution_results(state.context)
+
+        # Get current date and time
+        today_str, current_time_str = self._now_strs()
+
+        parts = self._INITIAL_PARTS
+        prompt = "".join((
+            parts[0], today_str,
+            parts[1], current_time_str,
+            parts[2], state.request_text,
+            parts[3], context_str,
+            parts[4], recent_results_str or "",
+            parts[5],
+        ))
+
         try:
             # Call LLM
-            print(f"[Planner] Generating initial plan for request: {state.request_text[:100]}...")
-            content = await self.llm_client.generate(
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=4096
-            )
+            logger.debug("Generating initial plan for request: %s...", state.request_text[:100])
+            cache_scope = self._plan_cache_scope(state, today_str, recent_results_str)
+            cached = self.plan_cache.get(cache_scope, state.request_text) if cache_scope else None
+            list_scope = self._plan_cache_scope(state) if cache_scope else None
+            if cached is None and list_scope:
+                cached = self.tool_list_cache.get(list_scope, state.request_text)
+            streamed_steps = None
+            if cached is not None:
+                logger.debug("Plan cache hit, skipping LLM call")
+                content = cached
+            else:
+                content, streamed_steps = await self._stream_plan_steps(prompt)
             content = content.strip()
 
-            print(f"[Planner] LLM response received, length: {len(content)} chars")
-
-            # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
-
-            print(f"[Planner] Parsing JSON response...")
-            print(f"[Planner] Raw JSON content: {content[:500]}...")  # Log first 500 chars
-
-            # Try to parse JSON first, only apply fix if parsing fails
-            try:
-                response_data = json.loads(content)
-                print(f"[Planner] JSON parsing successful")
-            except json.JSONDecodeError as e:
-                print(f"[Planner] Initial JSON parsing failed: {str(e)}")
-                print(f"[Planner] Applying placeholder fix and retrying...")
-                # Fix unquoted placeholders in JSON before parsing
-                content = self._fix_placeholders_in_json(content)
-                print(f"[Planner] After placeholder fix: {content[:500]}...")
-                response_data = json.loads(content)
-                print(f"[Planner] JSON parsing successful after fix")
+            logger.debug("LLM response received, length: %s chars", len(content))
+
+            if streamed_steps is not None:
+                # Steps were already parsed while the response streamed in
+                response_data = streamed_steps
+                if cache_scope:
+                    content = fast_dumps(streamed_steps)
+            else:
+                content, response_data = self._parse_llm_json(content, "plan")
 
             # Check if this is a tool list request
             if isinstance(response_data, dict) and response_data.get("type") == "tool_list_request":
-                print(f"[Planner] Detected tool list request")
-                tools_info = response_data.get("tools", [])
-
-                # Format tools information for user
-                tools_message = "Here are the tools I have access to:\n\n"
-                for i, tool in enumerate(self.settings.available_tools, 1):
-                    tools_message += f"{i}. **{tool.name}**: {tool.description}\n"
-                    if tool.input_schema and tool.input_schema.get('properties'):
-                        tools_message += "   Parameters:\n"
-                        properties = tool.input_schema['properties']
-                        required = tool.input_schema.get('required', [])
-                        for prop_name, prop_details in properties.items():
-                            req_marker = " (required)" if prop_name in required else " (optional)"
-                            prop_desc = prop_details.get('description', prop_details.get('type', ''))
-                            tools_message += f"   - {prop_name}{req_marker}: {prop_desc}\n"
-                    tools_message += "\n"
-
-                # Return as final response
-                state.type = StateType.FINAL
-                state.final_payload = {
-                    "message": tools_message,
-                    "data": {
-                        "tool_count": len(self.settings.available_tools),
-                        "tools": [
-                            {
-                                "name": tool.name,
-                                "description": tool.description,
-                                "input_schema": tool.input_schema
-                            }
-                            for tool in self.settings.available_tools
-                        ]
-                    }
-                }
-                return state
+                logger.info("Detected tool list request")
+                if list_scope and cached is None:
+                    self.tool_list_cache.put(list_scope, state.request_text, content)
+                return self._answer_tool_list_request(state)
 
             # Otherwise, treat as execution plan
-            steps_data = response_data if isinstance(response_data, list) else response_data.get("steps", [])
-            print(f"[Planner] Successfully parsed {len(steps_data)} steps")
+            parsed_steps = response_data if isinstance(response_data, list) else response_data.get("steps", [])
+            logger.debug("Successfully parsed %s steps", len(parsed_steps))
+
+            # Re-prompt once rather than failing on incomplete steps or dispatching
+            # steps for tools that don't exist
+            problems = self._find_plan_problems(parsed_steps)
+            if problems:
+                logger.warning("Plan %s, asking the LLM to correct it", "; ".join(problems))
+                content, parsed_steps = await self._replan_with_problems(prompt, problems)
+                problems = self._find_plan_problems(parsed_steps)
+                if problems:
+                    raise ValueError(f"Plan {'; '.join(problems)}")
 
             # Create plan
-            plan_id = str(uuid.uuid4())
+            plan_id = _new_plan_id()
             steps = []
-            dependencies = {}
 
-            for i, step_data in enumerate(steps_data):
-                step_id = f"step_{i}"
-                print(f"[Planner] Processing step {i}/{len(steps_data)-1}: {step_data.get('description', 'N/A')}")
+            # Bound once outside the loop
+            debug = logger.isEnabledFor(logging.DEBUG)
+            append_step = steps.append
+            normalize = self._normalize_dependencies
+            for i, step_data in enumerate(parsed_steps):
+                step_id = _step_id(i)
+                if debug:
+                    logger.debug("Processing step %s/%s: %s", i, len(parsed_steps) - 1, step_data.get('description', 'N/A'))
 
                 # Normalize dependencies - handle various input types
                 raw_deps = step_data.get("dependencies", [])
-                print(f"[Planner]   Raw dependencies: {raw_deps} (type: {type(raw_deps)})")
+                if debug:
+                    logger.debug("  Raw dependencies: %s (type: %s)", raw_deps, type(raw_deps))
+
+                normalized_deps = normalize(raw_deps)
+                if debug:
+                    logger.debug("  Normalized dependencies: %s", normalized_deps)
+
+                try:
+                    step = _build_step(
+                        step_id,
+                        step_data["tool_name"],
+                        step_data["input"],
+                        step_data["description"],
+                        normalized_deps
+                    )
+                    append_step(step)
+                    if debug:
+                        logger.debug("  ✓ Step created successfully")
+                except Exception as step_error:
+                    logger.error("Failed to create step %s: %s", step_id, step_error)
+                    logger.debug("  Step data: %s", dumps_indent(step_data))
+                    raise
+
+            plan = Plan(
+                plan_id=plan_id,
+                steps=steps
+            )
+
+            logger.info("Plan created successfully with %s steps", len(steps))
+            if cache_scope and cached is None:
+                self.plan_cache.put(cache_scope, state.request_text, content)
+
+            # Emit plan created event (skip building the payload when nobody is listening)
+            if self.event_emitter.has_subscribers(state.trace.trace_id):
+                await self.event_emitter.emit_plan_created(
+                    trace_id=state.trace.trace_id,
+                    plan_id=plan_id,
+                    steps=[
+                        {
+                            "step_id": step.step_id,
+                            "tool_name": step.tool_name,
+                            "description": step.description,
+                            "dependencies": step.dependencies
+                        }
+                        for step in steps
+                    ],
+                    total_steps=len(steps)
+                )
+
+            # Update state
+            state.plan = plan
+            state.plan_state = PlanState.PENDING
+            state.type = StateType.DISPATCH
+
+            return state
+
+        except json.JSONDecodeError as e:
+            # JSON parsing failed
+            logger.error("JSON parsing failed: %s", e)
+            logger.debug("Failed content: %s", content)
+            state.type = StateType.ERROR
+            state.error = f"Planning failed: Invalid JSON response from LLM - {str(e)}"
+            return state
+        except Exception as e:
+            # Planning failed
+            logger.exception("Planning failed")
+            state.type = StateType.ERROR
+            state.error = f"Planning failed: {str(e)}"
+            return state
+
+    def _decision_header(
+        self,
+        plan_id: str,
+        today_str: str,
+        request_text: str,
+        context_str: str
+    ) -> tuple[str, str]:
+        """
+        Get the static part of the decision prompt, built once per plan
+
+        Args:
+            plan_id: Plan the decision is made for
+            today_str: Today's date
+            request_text: Original user request
+            context_str: Formatted context
+
+        Returns:
+            Tuple of (text before the current time, text between the current time and the results)
+        """
+        key = (today_str, request_text, context_str)
+        cached = self._decision_header_cache.get(plan_id)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+
+        parts = self._DECISION_PARTS
+        head = parts[0] + today_str + parts[1]
+        tail = "".join((parts[2], request_text, parts[3], context_str, parts[4]))
+
+        if plan_id not in self._decision_header_cache and len(self._decision_header_cache) >= 64:
+            # Drop the oldest plan (dicts keep insertion order)
+            del self._decision_header_cache[next(iter(self._decision_header_cache))]
+        self._decision_header_cache[plan_id] = (key, head, tail)
+        return head, tail
+
+    async def _stream_plan_steps(self, prompt: str) -> tuple[str, Optional[list]]:
+        """
+        Stream a planning response, parsing its steps while the text arrives
 
-                normalized_deps = self._normalize_dependencies(raw_deps)
-                print(f"[Planner]   Normalized dependencies: {normalized_deps}")
+        Args:
+            prompt: Planning prompt
+
+        Returns:
+            Tuple of (response text, parsed steps). Steps are None when the response
+            is not a plain JSON array and must be parsed from the text. Once the array
+            is complete the rest of the response (closing fence, remarks) is not read.
+        """
+        messages = [{"role": "user", "content": prompt}]
+        parts = []
+        splitter = JsonArrayStream(loads=fast_loads)
+        async with aclosing(
+            self._stream_llm(
+                messages=messages, max_tokens=_MAX_OUTPUT_TOKENS, system=self._plan_system, cacheable=True
+            )
+        ) as stream:
+            async for chunk in stream:
+                parts.append(chunk)
+                for step_data in splitter.feed(chunk):
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Streamed step %s: %s", len(splitter.items) - 1, step_data)
+                if splitter.done:
+                    break
+
+        if not splitter.complete:
+            return "".join(parts), None
+        if isinstance(self.llm_client, CachedLLMClient):
+            # The stream was cut short, so cache the part that was used
+            self.llm_client.store(
+                messages, fast_dumps(splitter.items), max_tokens=_MAX_OUTPUT_TOKENS, system=self._plan_system
+            )
+        return "".join(parts), splitter.items
+
+    def _stream_llm(
+        self, messages: list[dict], max_tokens: int, system: Optional[str] = None, cacheable: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Stream an LLM response, aborting when the provider stops sending text
+
+        Args:
+            messages: Conversation messages
+            max_tokens: Maximum tokens to generate
+            system: Static system prompt
+            cacheable: Whether the response may be replayed for an identical request. Only
+                for prompts that don't act on execution results (plan generation); decisions
+                and placeholder resolutions must always see fresh state.
+
+        Returns:
+            Async iterator of response text chunks
+        """
+        if cacheable and isinstance(self.llm_client, CachedLLMClient):
+            stream = self.llm_client.generate_stream(
+                messages=messages, max_tokens=max_tokens, system=system, cacheable=True
+            )
+        else:
+            stream = self.llm_client.generate_stream(messages=messages, max_tokens=max_tokens, system=system)
+        return stream_with_idle_timeout(stream, _STREAM_IDLE_TIMEOUT)
+
+    async def _call_llm_json(
+        self, prompt: str, kind: str, system: str, max_tokens: int = _MAX_OUTPUT_TOKENS
+    ) -> tuple[str, Any]:
+        """
+        Stream an LLM response to a prompt and parse it as JSON
+
+        A response that does not parse under a reduced max_tokens was probably cut off,
+        so it is requested once more with the full output budget.
+
+        Args:
+            prompt: User prompt
+            kind: What the response is, for log messages (e.g. "decision")
+            system: Static system prompt for this kind of call (e.g. self._decision_system)
+            max_tokens: Maximum tokens to generate
+
+        Returns:
+            Tuple of (JSON text that was parsed, parsed data)
+
+        Raises:
+            json.JSONDecodeError: If the response is not valid JSON even after fixing placeholders
+        """
+        messages = [{"role": "user", "content": prompt}]
+        parts = []
+        async for chunk in self._stream_llm(messages, max_tokens, system=system):
+            parts.append(chunk)
+        content = "".join(parts)
+        logger.debug("%s response received, length: %s chars", kind.capitalize(), len(content))
+        try:
+            return self._parse_llm_json(content, kind)
+        except json.JSONDecodeError:
+            if max_tokens >= _MAX_OUTPUT_TOKENS:
+                raise
+            logger.warning(
+                "%s response unparsable with max_tokens=%s, retrying with %s",
+                kind.capitalize(), max_tokens, _MAX_OUTPUT_TOKENS
+            )
+            return await self._call_llm_json(prompt, kind, system, _MAX_OUTPUT_TOKENS)
+
+    def _parse_llm_json(self, content: str, kind: str) -> tuple[str, Any]:
+        """
+        Parse a JSON LLM response, possibly fenced or with unquoted placeholders
+
+        Args:
+            content: Response text
+            kind: What the response is, for log messages (e.g. "plan")
+
+        Returns:
+            Tuple of (JSON text that was parsed, parsed data)
+
+        Raises:
+            json.JSONDecodeError: If the response is not valid JSON even after fixing placeholders
+        """
+        # Remove markdown code blocks if present
+        content = _strip_fence(content)
+
+        logger.debug("Parsing %s JSON...", kind)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Raw %s content: %s...", kind, content[:500])  # Log first 500 chars
+
+        # Try to parse JSON first, only apply fix if parsing fails
+        try:
+            data = fast_loads(content)
+            logger.debug("%s JSON parsing successful", kind.capitalize())
+        except json.JSONDecodeError as e:
+            logger.debug("Initial %s JSON parsing failed: %s", kind, e)
+            logger.debug("Applying placeholder fix and retrying...")
+            # Fix unquoted placeholders in JSON before parsing
+            content = self._fix_placeholders_in_json(content)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("After placeholder fix: %s...", content[:500])
+            data = fast_loads(content)
+            logger.debug("%s JSON parsing successful after fix", kind.capitalize())
+
+        return content, data
+
+    def _find_plan_problems(self, parsed_steps: list) -> list[str]:
+        """
+        Check parsed plan steps before any Step is built
 
-                try:
-                    step = Step(
-                        step_id=step_id,
-                        tool_name=step_data["tool_name"],
-                        input=step_data["input"],
-                        description=step_data["description"],
-                        dependencies=normalized_deps
-                    )
-                    steps.append(step)
-                    dependencies[step_id] = step.dependencies
-                    print(f"[Planner]   ✓ Step created successfully")
-                except Exception as step_error:
-                    print(f"[Planner]   ✗ Failed to create step {step_id}")
-                    print(f"[Planner]   Error: {str(step_error)}")
-                    print(f"[Planner]   Step data: {json.dumps(step_data, indent=2)}")
-                    raise
+        Args:
+            parsed_steps: Step dicts from the planning response
 
-            plan = Plan(
-                plan_id=plan_id,
-                steps=steps,
-                dependencies=dependencies
-            )
+        Returns:
+            Problem descriptions that complete "Plan ...", empty if the steps are usable
+        """
+        problems = []
+        incomplete = [
+            _step_id(i) for i, step_data in enumerate(parsed_steps)
+            if not isinstance(step_data, dict) or not _REQUIRED_STEP_KEYS <= step_data.keys()
+        ]
+        if incomplete:
+            problems.append(f"has steps without tool_name, input or description: {', '.join(incomplete)}")
+        unknown_tools = self._find_unknown_tools(parsed_steps)
+        if unknown_tools:
+            problems.append(f"uses unknown tools: {', '.join(unknown_tools)}")
+        return problems
+
+    def _find_unknown_tools(self, parsed_steps: list) -> list[str]:
+        """
+        Find tool names in parsed steps that are not available
 
-            print(f"[Planner] Plan created successfully with {len(steps)} steps")
+        Args:
+            parsed_steps: Step dicts from the planning response
 
-            # Emit plan created event
-            steps_data = [
-                {
-                    "step_id": step.step_id,
-                    "tool_name": step.tool_name,
-                    "description": step.description,
-                    "dependencies": step.dependencies
-                }
-                for step in steps
-            ]
-            await self.event_emitter.emit_plan_created(
-                trace_id=state.trace.trace_id,
-                plan_id=plan_id,
-                steps=steps_data,
-                total_steps=len(steps)
-            )
+        Returns:
+            Unknown tool names in order of first use
+        """
+        unknown_tools = []
+        for step_data in parsed_steps:
+            tool_name = step_data.get("tool_name") if isinstance(step_data, dict) else None
+            if isinstance(tool_name, str) and tool_name not in self._tool_names and tool_name not in unknown_tools:
+                unknown_tools.append(tool_name)
+        return unknown_tools
+
+    async def _replan_with_problems(self, prompt: str, problems: list[str]) -> tuple[str, list]:
+        """
+        Ask the LLM once more for a plan, pointing out what was wrong with the previous one
 
-            # Update state
-            state.plan = plan
-            state.plan_state = PlanState.PENDING
-            state.type = StateType.DISPATCH
+        Args:
+            prompt: Original planning prompt
+            problems: Problems found by _find_plan_problems
 
-            return state
+        Returns:
+            Tuple of (JSON text of the corrected plan, parsed steps)
+        """
+        hint = (
+            f"\n\nYour previous plan {'; '.join(problems)}.\n"
+            "Create the plan again using ONLY the exact tool names from the system prompt, "
+            "with tool_name, input and description in every step."
+        )
+        content, parsed_steps = await self._stream_plan_steps(prompt + hint)
+        if parsed_steps is not None:
+            return fast_dumps(parsed_steps), parsed_steps
 
-        except json.JSONDecodeError as e:
-            # JSON parsing failed
-            print(f"[Planner] ERROR: JSON parsing failed")
-            print(f"[Planner] JSONDecodeError: {str(e)}")
-            print(f"[Planner] Failed content: {content}")
-            state.type = StateType.ERROR
-            state.error = f"Planning failed: Invalid JSON response from LLM - {str(e)}"
-            return state
-        except Exception as e:
-            # Planning failed
-            print(f"[Planner] ERROR: Planning failed with exception")
-            print(f"[Planner] Exception type: {type(e).__name__}")
-            print(f"[Planner] Exception message: {str(e)}")
-            import traceback
-            print(f"[Planner] Traceback:\n{traceback.format_exc()}")
-            state.type = StateType.ERROR
-            state.error = f"Planning failed: {str(e)}"
-            return state
+        content, response_data = self._parse_llm_json(content, "plan")
+        if isinstance(response_data, list):
+            return content, response_data
+        return content, response_data.get("steps", [])
 
     async def _decide_next(self, state: State) -> State:
         """Decide next action based on current results"""
 
         # Increment total decision count
         state.total_decision_count += 1
-        print(f"[Planner] Decision count: {state.total_decision_count}")
+        logger.debug("Decision count: %s", state.total_decision_count)
 
         # Check if total decision count exceeds maximum (prevent infinite loops)
         MAX_TOTAL_DECISIONS = 10
         if state.total_decision_count > MAX_TOTAL_DECISIONS:
             error_msg = f"Task failed: Exceeded maximum decision limit ({MAX_TOTAL_DECISIONS}). Possible infinite loop detected."
-            print(f"[Planner] {error_msg}")
+            logger.warning("%s", error_msg)
             state.type = StateType.ERROR
             state.error = error_msg
             return state
@@ -391,23 +1082,27 @@ Return ONLY the JSON (either tool list or execution plan), no other text.
         results = state.results
         if not results:
             # No results yet, shouldn't happen
-            print(f"[Planner] ERROR: No results available for decision")
+            logger.error("No results available for decision")
             state.type = StateType.ERROR
             state.error = "No results available for decision"
             return state
 
-        # Check for validation errors that require human input
+        # Classify each failure once: (failed_step, matched error class or None)
+        classified_failures = []
         for failed_step in results.failed_steps:
-            if failed_step.error and "Email validation failed" in failed_step.error:
-                print(f"[Planner] Detected email validation failure in step {failed_step.step_id}")
-                print(f"[Planner] Error: {failed_step.error}")
+            match = _ERROR_CLASSIFIER.search(failed_step.error) if failed_step.error else None
+            classified_failures.append((failed_step, match.lastindex if match else None))
+
+        # Check for validation errors that require human input
+        for failed_step, error_class in classified_failures:
+            if error_class == _ERR_EMAIL_VALIDATION:
+                logger.warning("Detected email validation failure in step %s: %s", failed_step.step_id, failed_step.error)
 
                 # Extract missing parameter information
                 missing_param_info = extract_missing_params(failed_step.error)
                 question = missing_param_info.get("question", "유효한 입력이 필요합니다.")
 
-                print(f"[Planner] Transitioning to HUMAN_IN_THE_LOOP")
-                print(f"[Planner] Question: {question}")
+                logger.info("Transitioning to HUMAN_IN_THE_LOOP: %s", question)
 
                 # Transition to Human-in-the-loop
                 state.type = StateType.HUMAN_IN_THE_LOOP
@@ -422,34 +1117,32 @@ Return ONLY the JSON (either tool list or execution plan), no other text.
         # Check if any steps have exceeded max retries or have non-retryable errors
         max_retries = self.settings.max_retries  # Default is 3 from types.py
         steps_exceeded_retries = []
-        steps_with_non_retryable_errors = []
+        steps_with_non_retryable_errors: list[tuple[str, str]] = []  # (step_id, error)
 
-        for failed_step in results.failed_steps:
+        for failed_step, error_class in classified_failures:
             step_id = failed_step.step_id
             error_msg = failed_step.error or ""
 
             # Check for non-retryable errors (e.g., tool not found)
-            if "No MCP server found for tool" in error_msg:
-                steps_with_non_retryable_errors.append(step_id)
-                print(f"[Planner] Step {step_id} has non-retryable error: {error_msg}")
+            if error_class == _ERR_NO_MCP_SERVER:
+                steps_with_non_retryable_errors.append((step_id, failed_step.error))
+                logger.warning("Step %s has non-retryable error: %s", step_id, error_msg)
                 continue
 
             retry_count = state.retry_counts.get(step_id, 0)
-            print(f"[Planner] Step {step_id} failure count: {retry_count + 1}/{max_retries}")
+            logger.warning("Step %s failure count: %s/%s", step_id, retry_count + 1, max_retries)
 
             if retry_count >= max_retries:
                 steps_exceeded_retries.append(step_id)
-                print(f"[Planner] Step {step_id} has exceeded max retries ({max_retries})")
+                logger.warning("Step %s has exceeded max retries (%s)", step_id, max_retries)
 
         # If any steps have non-retryable errors, fail immediately with detailed message
         if steps_with_non_retryable_errors:
-            failed_steps_info = []
-            for failed_step in results.failed_steps:
-                if failed_step.step_id in steps_with_non_retryable_errors:
-                    failed_steps_info.append(f"{failed_step.step_id}: {failed_step.error}")
-
+            failed_steps_info = [
+                f"{step_id}: {error}" for step_id, error in steps_with_non_retryable_errors
+            ]
             error_msg = f"Task failed: Steps have non-retryable errors:\n" + "\n".join(failed_steps_info)
-            print(f"[Planner] {error_msg}")
+            logger.warning("%s", error_msg)
             state.type = StateType.ERROR
             state.error = error_msg
             return state
@@ -457,21 +1150,23 @@ Return ONLY the JSON (either tool list or execution plan), no other text.
         # If any steps exceeded retries, fail the task
         if steps_exceeded_retries:
             error_msg = f"Task failed: The following steps exceeded maximum retry limit ({max_retries}): {', '.join(steps_exceeded_retries)}"
-            print(f"[Planner] {error_msg}")
+            logger.warning("%s", error_msg)
             state.type = StateType.ERROR
             state.error = error_msg
             return state
 
-        # Increment retry counts for failed steps (excluding non-retryable)
+        # Increment retry counts for failed steps (non-retryable errors returned above)
+        retry_counts = Counter(state.retry_counts)
         for failed_step in results.failed_steps:
             step_id = failed_step.step_id
-            if step_id not in steps_with_non_retryable_errors:
-                state.retry_counts[step_id] = state.retry_counts.get(step_id, 0) + 1
-                print(f"[Planner] Incremented retry count for {step_id}: {state.retry_counts[step_id]}")
+            retry_counts[step_id] += 1
+            logger.debug("Incremented retry count for %s: %s", step_id, retry_counts[step_id])
+        # Stored back as a plain dict since the state is serialized between graph nodes
+        state.retry_counts = dict(retry_counts)
 
         # Check if there are pending steps (not yet executed)
-        completed_step_ids = {step.step_id for step in results.completed_steps}
-        failed_step_ids = {step.step_id for step in results.failed_steps}
+        completed_step_ids = results.completed_ids
+        failed_step_ids = results.failed_ids
         pending_steps = [
             step for step in state.plan.steps
             if step.step_id not in completed_step_ids and step.step_id not in failed_step_ids
@@ -479,146 +1174,55 @@ Return ONLY the JSON (either tool list or execution plan), no other text.
 
         # If there are pending steps, resolve placeholders with LLM
         if pending_steps:
-            print(f"[Planner] Found {len(pending_steps)} pending steps:")
-            for step in pending_steps:
-                print(f"[Planner]   - {step.step_id}: {step.description}")
+            logger.debug("Found %s pending steps", len(pending_steps))
+            if logger.isEnabledFor(logging.DEBUG):
+                for step in pending_steps:
+                    logger.debug("  - %s: %s", step.step_id, step.description)
 
             # Resolve placeholders for next step with LLM assistance
             return await self._resolve_placeholders_for_next_step(state, pending_steps, results)
 
-        # All steps executed - now ask LLM for final decision
-        print(f"[Planner] No pending steps. All steps have been executed.")
-        print(f"[Planner] Asking LLM to make final decision...")
+        # All steps executed - now ask LLM for final decision. One call covers every
+        # failure: per-failure calls could disagree on the outcome and on new step ids.
+        logger.debug("No pending steps. All steps have been executed.")
 
         # Build prompt for decision
         results_summary = self._format_results(results, state.plan)
         context_str = self._format_context(state.context)
-        tools_list_detailed = self._format_tools_detailed()
 
         # Get current date and time
-        current_datetime = datetime.now()
-        today_str = current_datetime.strftime("%Y-%m-%d (%A)")
-        current_time_str = current_datetime.strftime("%H:%M:%S")
-
-        prompt = f"""You are an AI assistant making STEP-BY-STEP decisions about task execution.
-
-IMPORTANT CONTEXT:
-- Today's date: {today_str}
-- Current time: {current_time_str}
-- When interpreting time references (e.g., "this week", "next week", "tomorrow", "last week"), use today's date as the reference point.
-
-IMPORTANT: All planned steps have been executed. Now you need to decide if the task is complete or if additional steps are needed.
-
-Original request: {state.request_text}
-
-Context:
-{context_str}
-
-Available tools (you MUST use these exact tool names):
-{tools_list_detailed}
-
-CRITICAL: You MUST use ONLY the exact tool names listed above. DO NOT create variations or guess tool names.
-
-Execution results (all steps have been executed):
-{results_summary}
-
-ANALYZING STEP RESULTS:
-- Look at the actual data returned by each completed step
-- If a step returned a list of items (e.g., calendar events), you can:
-  * Check if the desired item exists in the list
-  * Create a new step to process specific items based on their properties
-  * Use the actual IDs, titles, or other fields from the results
-- You do NOT need to rely only on placeholder syntax like {{{{step_0.events.0.id}}}}
-- Instead, you can examine the step output and create intelligent next steps
-
-CRITICAL - HANDLING EMPTY OR NULL RESULTS:
-- ALWAYS check if previous step results are empty, null, or contain no data
-- If a step returned an empty list [], null, or no items:
-  * DO NOT create follow-up steps that depend on that data
-  * DO NOT use empty values as input to subsequent steps (e.g., don't pass "" to search queries)
-  * Instead, either:
-    a) Skip the dependent steps and mark task as complete with appropriate message
-    b) Return "needsHuman" if user input is needed to proceed
-    c) Adjust the plan to handle the empty case gracefully
-- Examples:
-  * If list_events returns no events, DON'T create a search_issues step with empty meeting summary
-  * If search_issues returns no issues, DON'T try to process non-existent issue data
-  * If a required item is not found, DON'T proceed with placeholder or empty values
-
-DECISION OPTIONS:
-1. "final" - Task is complete, return final response to user
-2. "nextSteps" - More steps needed based on the results you analyzed
-   - Create new steps dynamically using the actual data from previous steps
-   - You can reference specific values you found in the step outputs
-   - Each new step should have: tool_name, input, description, dependencies
-3. "needsHuman" - Requires human intervention (missing info, ambiguous results, etc.)
-4. "failed" - Task failed and cannot continue
-
-PLACEHOLDER SYNTAX FOR NEXT STEPS (when needed):
-- To reference previous step output: {{{{step_N}}}} or {{{{step_N.field_name}}}}
-- To access array elements: {{{{step_N.array.0.id}}}} (use dot notation)
-- NOTE: Steps are 0-indexed (step_0 is first step, step_1 is second, etc.)
-- But prefer using actual values from the results when possible!
-
-Return your decision as JSON:
-{{
-  "type": "final|nextSteps|needsHuman|failed",
-  "reason": "explanation of your analysis and decision",
-  "payload": {{
-    // For "final": {{"message": "success message to user", "data": <optional result data>}}
-    // For "nextSteps": {{"steps": [
-    //   {{
-    //     "tool_name": "tool_name",
-    //     "input": {{"param": "value or {{{{placeholder}}}}"}},
-    //     "description": "what this step does",
-    //     "dependencies": [0, 1]  // indices of steps this depends on
-    //   }}
-    // ]}}
-    // For "needsHuman": {{"question": "what to ask the user"}}
-    // For "failed": {{"error": "error description"}}
-  }}
-}}
+        today_str, current_time_str = self._now_strs()
 
-Return ONLY the JSON, no other text.
-"""
+        head, tail = self._decision_header(
+            state.plan.plan_id, today_str, state.request_text, context_str
+        )
+        prompt = "".join((head, current_time_str, tail, results_summary, self._DECISION_FOOTER))
 
         try:
-            print(f"[Planner] Making decision for plan: {state.plan.plan_id if state.plan else 'N/A'}")
-            content = await self.llm_client.generate(
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=4096
-            )
-            content = content.strip()
-
-            print(f"[Planner] Decision response received, length: {len(content)} chars")
-
-            # Remove markdown code blocks if present
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:]
-                content = content.strip()
-
-            print(f"[Planner] Parsing decision JSON...")
-            print(f"[Planner] Raw decision content: {content[:500]}...")
-
-            # Try to parse JSON first, only apply fix if parsing fails
-            try:
-                decision_data = json.loads(content)
-                print(f"[Planner] Decision JSON parsing successful")
-            except json.JSONDecodeError as e:
-                print(f"[Planner] Initial decision JSON parsing failed: {str(e)}")
-                print(f"[Planner] Applying placeholder fix and retrying...")
-                content = self._fix_placeholders_in_json(content)
-                print(f"[Planner] After placeholder fix: {content[:500]}...")
-                decision_data = json.loads(content)
-                print(f"[Planner] Decision JSON parsing successful after fix")
+            logger.debug("Making decision for plan: %s", state.plan.plan_id if state.plan else 'N/A')
+            # Final decisions are only reused for identical results and context
+            cache_scope = self._plan_cache_scope(state, today_str, context_str, results_summary)
+            cached = self.decision_cache.get(cache_scope, state.request_text) if cache_scope else None
+            if cached is not None:
+                logger.debug("Decision cache hit, skipping LLM call")
+                content, decision_data = self._parse_llm_json(cached, "decision")
+            else:
+                max_tokens = min(
+                    _MAX_OUTPUT_TOKENS,
+                    _DECISION_BASE_TOKENS + _DECISION_TOKENS_PER_STEP * len(state.plan.steps)
+                )
+                content, decision_data = await self._call_llm_json(
+                    prompt, "decision", self._decision_system, max_tokens
+                )
             decision_type = decision_data["type"]
-            print(f"[Planner] Decision type: {decision_type}")
+            logger.debug("Decision type: %s", decision_type)
+            # nextSteps decisions run more tools, so only final answers are replayed
+            if cache_scope and cached is None and decision_type == "final":
+                self.decision_cache.put(cache_scope, state.request_text, content)
 
             if decision_type == "final":
                 # Task complete
-                print(f"[Planner] Decision: Task completed")
+                logger.info("Decision: Task completed")
 
                 # Emit decision made event
                 await self.event_emitter.emit_decision_made(
@@ -634,77 +1238,73 @@ Return ONLY the JSON, no other text.
 
             elif decision_type == "nextSteps":
                 # Add more steps to plan
-                print(f"[Planner] Decision: Next steps required")
+                logger.info("Decision: Next steps required")
                 next_steps_data = decision_data["payload"].get("steps", [])
-                print(f"[Planner] Processing {len(next_steps_data)} next steps...")
+                logger.debug("Processing %s next steps...", len(next_steps_data))
 
                 # Process each next step
                 updated_steps = []
+                # Bound once outside the loop
+                debug = logger.isEnabledFor(logging.DEBUG)
+                append_step = updated_steps.append
+                normalize = self._normalize_dependencies
+                first_new_index = len(state.plan.steps)
                 for i, step_data in enumerate(next_steps_data):
-                    print(f"[Planner]   Processing next step {i+1}: {step_data.get('description', 'N/A')}")
+                    get = step_data.get
+                    if debug:
+                        logger.debug("  Processing next step %s: %s", i + 1, get('description', 'N/A'))
 
                     # Normalize dependencies
-                    raw_deps = step_data.get("dependencies", [])
-                    normalized_deps = self._normalize_dependencies(raw_deps)
-                    print(f"[Planner]   Dependencies normalized: {raw_deps} -> {normalized_deps}")
+                    raw_deps = get("dependencies", [])
+                    normalized_deps = normalize(raw_deps)
+                    if debug:
+                        logger.debug("  Dependencies normalized: %s -> %s", raw_deps, normalized_deps)
 
                     # Determine step_id (check if LLM provided 'id' field for retry)
                     if "id" in step_data:
                         step_id = step_data["id"]
-                        print(f"[Planner]   Retry detected for step: {step_id}")
+                        if type(step_id) is str:
+                            # Interned like generated ids, so dict lookups can compare by identity
+                            step_id = sys.intern(step_id)
+                        if debug:
+                            logger.debug("  Retry detected for step: %s", step_id)
                     else:
                         # New step - generate new ID (consistent with initial plan: step_0, step_1, ...)
-                        step_id = f"step_{len(state.plan.steps) + i}"
-                        print(f"[Planner]   New step created: {step_id}")
+                        step_id = _step_id(first_new_index + i)
+                        if debug:
+                            logger.debug("  New step created: %s", step_id)
 
                     # Get tool_name from either 'tool_name', 'tool', or 'action' field
-                    tool_name = step_data.get("tool_name") or step_data.get("tool") or step_data.get("action")
+                    tool_name = get("tool_name") or get("tool") or get("action")
                     if not tool_name:
-                        print(f"[Planner]   ERROR: No tool_name found in step_data: {step_data}")
+                        logger.error("No tool_name found in step_data: %s", step_data)
                         continue
 
                     # Get input from either 'input' or 'parameters' field
-                    step_input = step_data.get("input") or step_data.get("parameters", {})
+                    step_input = get("input") or get("parameters", {})
 
                     # Create step object
-                    step = Step(
-                        step_id=step_id,
-                        tool_name=tool_name,
-                        input=step_input,
-                        description=step_data.get("description", ""),
-                        dependencies=normalized_deps
-                    )
-                    updated_steps.append(step)
-                    print(f"[Planner]   ✓ Step created: {step_id} with tool {tool_name}")
+                    step = _build_step(step_id, tool_name, step_input, get("description", ""), normalized_deps)
+                    append_step(step)
+                    if debug:
+                        logger.debug("  ✓ Step created: %s with tool %s", step_id, tool_name)
 
                 # Update plan with new/updated steps
                 if updated_steps:
-                    # Check if we're updating existing steps or adding new ones
-                    existing_step_ids = {s.step_id for s in state.plan.steps}
-                    new_step_ids = {s.step_id for s in updated_steps}
-
-                    # If updating existing steps, replace them
-                    if new_step_ids & existing_step_ids:
-                        print(f"[Planner]   Updating existing steps: {new_step_ids & existing_step_ids}")
-                        # Create new steps list with updates
-                        final_steps = []
-                        updated_by_id = {s.step_id: s for s in updated_steps}
-                        for step in state.plan.steps:
-                            if step.step_id in updated_by_id:
-                                final_steps.append(updated_by_id[step.step_id])
-                            else:
-                                final_steps.append(step)
-                        state.plan.steps = final_steps
-                    else:
-                        # Adding new steps
-                        print(f"[Planner]   Adding {len(updated_steps)} new steps to plan")
-                        state.plan.steps.extend(updated_steps)
-
-                    # Update dependencies dict
-                    for step in updated_steps:
-                        state.plan.dependencies[step.step_id] = step.dependencies
-
-                    print(f"[Planner]   Plan now has {len(state.plan.steps)} total steps")
+                    # One pass over the plan: retried steps replace their originals in place,
+                    # the remaining ones are appended as new steps
+                    pending_by_id = {s.step_id: s for s in updated_steps}
+                    plan_steps = state.plan.steps
+                    for index, step in enumerate(plan_steps):
+                        replacement = pending_by_id.pop(step.step_id, None)
+                        if replacement is not None:
+                            plan_steps[index] = replacement
+                            logger.debug("  Updated existing step: %s", step.step_id)
+                    if pending_by_id:
+                        logger.debug("  Adding %s new steps to plan", len(pending_by_id))
+                        plan_steps.extend(pending_by_id.values())
+
+                    logger.debug("Plan now has %s total steps", len(state.plan.steps))
 
                 # Emit decision made event
                 await self.event_emitter.emit_decision_made(
@@ -720,7 +1320,7 @@ Return ONLY the JSON, no other text.
 
             elif decision_type == "needsHuman":
                 # Needs human input
-                print(f"[Planner] Decision: Human intervention required")
+                logger.info("Decision: Human intervention required")
 
                 # Emit decision made event
                 await self.event_emitter.emit_decision_made(
@@ -736,9 +1336,8 @@ Return ONLY the JSON, no other text.
 
             elif decision_type == "failed":
                 # Failed
-                print(f"[Planner] Decision: Task failed")
                 error_msg = decision_data["payload"].get("error", "Task failed")
-                print(f"[Planner] Error: {error_msg}")
+                logger.info("Decision: Task failed - %s", error_msg)
 
                 # Emit decision made event
                 await self.event_emitter.emit_decision_made(
@@ -753,24 +1352,19 @@ Return ONLY the JSON, no other text.
                 return state
 
             else:
-                print(f"[Planner] ERROR: Unknown decision type: {decision_type}")
+                logger.error("Unknown decision type: %s", decision_type)
                 state.type = StateType.ERROR
                 state.error = f"Unknown decision type: {decision_type}"
                 return state
 
         except json.JSONDecodeError as e:
-            print(f"[Planner] ERROR: Decision JSON parsing failed")
-            print(f"[Planner] JSONDecodeError: {str(e)}")
-            print(f"[Planner] Failed content: {content}")
+            logger.error("Decision JSON parsing failed: %s", e)
+            logger.debug("Failed content: %s", content)
             state.type = StateType.ERROR
             state.error = f"Decision making failed: Invalid JSON response - {str(e)}"
             return state
         except Exception as e:
-            print(f"[Planner] ERROR: Decision making failed with exception")
-            print(f"[Planner] Exception type: {type(e).__name__}")
-            print(f"[Planner] Exception message: {str(e)}")
-            import traceback
-            print(f"[Planner] Traceback:\n{traceback.format_exc()}")
+            logger.exception("Decision making failed")
             state.type = StateType.ERROR
             state.error = f"Decision making failed: {str(e)}"
             return state
@@ -792,24 +1386,25 @@ Return ONLY the JSON, no other text.
         Returns:
             Updated state with resolved placeholders and DISPATCH type
         """
-        # Find next step to execute (first pending step with satisfied dependencies)
-        next_step = self._find_next_executable_step(pending_steps, results)
+        # Find steps that can be executed; the first one runs next
+        ready_steps = self._find_all_executable_steps(pending_steps, results)
 
-        if not next_step:
+        if not ready_steps:
             # No executable step found, transition to error
-            print(f"[Planner] ERROR: No executable step found among pending steps")
+            logger.error("No executable step found among pending steps")
             state.type = StateType.ERROR
             state.error = "No executable step found"
             return state
 
-        print(f"[Planner] Next step to execute: {next_step.step_id} - {next_step.description}")
+        next_step = ready_steps[0]
+        logger.info("Next step to execute: %s - %s", next_step.step_id, next_step.description)
 
         # Check if step has placeholders that need resolving
         has_placeholders = self._check_for_placeholders(next_step.input)
 
         if not has_placeholders:
             # No placeholders, just continue to dispatch
-            print(f"[Planner] No placeholders found in {next_step.step_id}, continuing to DISPATCH")
+            logger.debug("No placeholders found in %s, continuing to DISPATCH", next_step.step_id)
             await self.event_emitter.emit_decision_made(
                 trace_id=state.trace.trace_id,
                 decision_type="continue",
@@ -824,30 +1419,32 @@ Return ONLY the JSON, no other text.
 
         if not latest_result:
             # No previous results, can't resolve placeholders
-            print(f"[Planner] WARNING: No previous step results available for placeholder resolution")
+            logger.warning("No previous step results available for placeholder resolution")
             state.type = StateType.DISPATCH
             return state
 
-        # Call LLM to resolve placeholders
-        print(f"[Planner] Calling LLM to resolve placeholders for {next_step.step_id}")
-
-        try:
-            resolved_input = await self._call_llm_for_placeholder_resolution(
-                next_step, latest_result, results, state
+        steps_to_resolve = [next_step]
+        if self.settings.parallel_resolution:
+            # Resolve every other ready step now so later decisions skip the LLM round-trip
+            steps_to_resolve.extend(
+                step for step in ready_steps[1:] if self._check_for_placeholders(step.input)
             )
 
+        # Resolve placeholders (independent steps concurrently)
+        logger.debug(
+            "Resolving placeholders for %s",
+            ", ".join(step.step_id for step in steps_to_resolve)
+        )
+        resolved_inputs = await asyncio.gather(*(
+            self._resolve_step_placeholders(step, latest_result, results, state)
+            for step in steps_to_resolve
+        ))
+
+        # Pending steps are the plan's own Step objects, so they are updated in place
+        for step, resolved_input in zip(steps_to_resolve, resolved_inputs):
             if resolved_input:
-                # Update the step in the plan with resolved input
-                for i, step in enumerate(state.plan.steps):
-                    if step.step_id == next_step.step_id:
-                        state.plan.steps[i].input = resolved_input
-                        print(f"[Planner] Updated {next_step.step_id} with resolved input: {resolved_input}")
-                        break
-        except Exception as e:
-            print(f"[Planner] ERROR: Failed to resolve placeholders: {str(e)}")
-            import traceback
-            print(f"[Planner] Traceback:\n{traceback.format_exc()}")
-            # Continue anyway - dispatcher will try to resolve with PlaceholderResolver
+                step.input = resolved_input
+                logger.debug("Updated %s with resolved input: %s", step.step_id, resolved_input)
 
         # Emit decision made event
         await self.event_emitter.emit_decision_made(
@@ -861,36 +1458,137 @@ Return ONLY the JSON, no other text.
         state.type = StateType.DISPATCH
         return state
 
-    def _find_next_executable_step(
+    async def _resolve_step_placeholders(
+        self,
+        step: Step,
+        latest_result: StepResult,
+        results: AggregatedGroupResults,
+        state: State
+    ) -> Optional[dict]:
+        """
+        Resolve placeholders of a single step, using the LLM only when needed
+
+        Args:
+            step: The step with placeholders to resolve
+            latest_result: Most recent step result
+            results: Results from executed steps
+            state: Current state
+
+        Returns:
+            Resolved input dict or None if resolution failed
+        """
+        # A HITL response may fill in values, which only the LLM can take into account
+        additional_context = state.context.additional_context if state.context else {}
+        if not additional_context.get("hitl_response"):
+            resolved_input = self._try_deterministic_resolve(step, results)
+            if resolved_input is not None:
+                logger.debug("Resolved placeholders for %s without LLM", step.step_id)
+                return resolved_input
+
+        try:
+            return await self._call_llm_for_placeholder_resolution(
+                step, latest_result, results, state
+            )
+        except Exception as e:
+            logger.error("Failed to resolve placeholders for %s: %s", step.step_id, e)
+            logger.debug("Traceback", exc_info=True)
+            # Continue anyway - dispatcher will try to resolve with PlaceholderResolver
+            return None
+
+    def _try_deterministic_resolve(self, step: Step, results: AggregatedGroupResults) -> Optional[dict]:
+        """
+        Resolve placeholders that are plain field references to completed step outputs
+
+        Args:
+            step: The step with placeholders to resolve
+            results: Results from executed steps
+
+        Returns:
+            Resolved input dict, or None if any placeholder needs the LLM (array
+            indexes, filters, expressions, or paths not found in the outputs)
+        """
+        outputs = {step_result.step_id: step_result.output for step_result in results.completed_steps}
+        resolved_input = self._resolve_references(step.input, outputs)
+        return None if resolved_input is _UNRESOLVED else resolved_input
+
+    def _resolve_references(self, value: Any, outputs: dict[str, Any]) -> Any:
+        """
+        Substitute plain step output references in a value
+
+        Args:
+            value: Value to resolve (can be dict, list, str, or primitive)
+            outputs: Step ID -> output of completed steps
+
+        Returns:
+            The resolved value, or _UNRESOLVED if any placeholder can't be resolved
+        """
+        if isinstance(value, dict):
+            resolved_dict = {}
+            for key, item in value.items():
+                resolved = self._resolve_references(item, outputs)
+                if resolved is _UNRESOLVED:
+                    return _UNRESOLVED
+                resolved_dict[key] = resolved
+            return resolved_dict
+
+        if isinstance(value, list):
+            resolved_list = []
+            for item in value:
+                resolved = self._resolve_references(item, outputs)
+                if resolved is _UNRESOLVED:
+                    return _UNRESOLVED
+                resolved_list.append(resolved)
+            return resolved_list
+
+        if not isinstance(value, str) or "{" not in value:
+            return value
+
+        parts = []
+        last_end = 0
+        for match in _PLACEHOLDER_RE.finditer(value):
+            reference = _STEP_REF_RE.fullmatch(match.group())
+            if not reference or reference.group(1) not in outputs:
+                return _UNRESOLVED
+
+            resolved = outputs[reference.group(1)]
+            for field in reference.group(2).split(".")[1:]:
+                if not isinstance(resolved, dict) or field not in resolved:
+                    return _UNRESOLVED
+                resolved = resolved[field]
+            if resolved is None:
+                return _UNRESOLVED
+
+            if match.start() == 0 and match.end() == len(value):
+                # The whole string is one placeholder: keep the value's type
+                return resolved
+            parts.append(value[last_end:match.start()])
+            parts.append(resolved if isinstance(resolved, str) else str(resolved))
+            last_end = match.end()
+
+        parts.append(value[last_end:])
+        return "".join(parts)
+
+    def _find_all_executable_steps(
         self,
         pending_steps: List[Step],
         results: AggregatedGroupResults
-    ) -> Optional[Step]:
+    ) -> List[Step]:
         """
-        Find the next step that can be executed (all dependencies satisfied)
+        Find all steps that can be executed (all dependencies satisfied)
 
         Args:
             pending_steps: List of pending steps
             results: Results from executed steps
 
         Returns:
-            Next executable step or None
+            Executable steps in plan order (empty if none)
         """
-        completed_step_ids = {step.step_id for step in results.completed_steps}
-
-        for step in pending_steps:
-            # Check if all dependencies are satisfied
-            if not step.dependencies:
-                # No dependencies, can execute
-                return step
+        # Set containment runs in C; steps without dependencies are trivially ready.
+        # Step ids are not always step_N (retried steps keep LLM-provided ids, and
+        # dependencies may name steps that don't exist), so they are not mapped to bits.
+        is_satisfied = results.completed_ids.issuperset
 
-            # Check if all dependencies are completed
-            deps_satisfied = all(dep in completed_step_ids for dep in step.dependencies)
-            if deps_satisfied:
-                return step
-
-        # No executable step found
-        return None
+        return [step for step in pending_steps if is_satisfied(step.dependencies)]
 
     def _check_for_placeholders(self, data: Any) -> bool:
         """
@@ -902,19 +1600,20 @@ Return ONLY the JSON, no other text.
         Returns:
             True if placeholders found, False otherwise
         """
-        import re
-
-        # Pattern matches: {{...}}, ${...}, or {...}
-        placeholder_pattern = re.compile(r'(\{\{([^}]+)\}\}|\$\{([^}]+)\}|\{([^}]+)\})')
-
-        if isinstance(data, str):
-            return bool(placeholder_pattern.search(data))
-        elif isinstance(data, dict):
-            return any(self._check_for_placeholders(v) for v in data.values())
-        elif isinstance(data, list):
-            return any(self._check_for_placeholders(item) for item in data)
-        else:
-            return False
+        # Walk without recursion and stop at the first string with a placeholder
+        search = _PLACEHOLDER_RE.search
+        stack = [data]
+        while stack:
+            value = stack.pop()
+            if isinstance(value, str):
+                # Every placeholder contains "{"; the substring test skips the regex for most strings
+                if "{" in value and search(value):
+                    return True
+            elif isinstance(value, dict):
+                stack.extend(value.values())
+            elif isinstance(value, list):
+                stack.extend(value)
+        return False
 
     async def _call_llm_for_placeholder_resolution(
         self,
@@ -949,107 +1648,92 @@ The user has provided additional information: "{hitl_response}"
 Use this information to resolve any missing parameters or placeholders.
 """
 
-        prompt = f"""You are helping resolve placeholders in a task execution step.
-
-MOST RECENT STEP EXECUTED:
-- Step ID: {latest_result.step_id}
-- Tool: {latest_result.tool_name if hasattr(latest_result, 'tool_name') else 'unknown'}
-- Output: {json.dumps(latest_result.output, indent=2)}
-
-ALL COMPLETED STEPS (for reference):
-{self._format_all_step_results(all_results)}
-{hitl_context}
-NEXT STEP TO EXECUTE:
-- Step ID: {next_step.step_id}
-- Description: {next_step.description}
-- Tool: {next_step.tool_name}
-- Input (with placeholders): {json.dumps(next_step.input, indent=2)}
-
-YOUR TASK:
-1. Analyze the output from previous steps (especially the most recent one)
-2. Read the NEXT STEP's description carefully to understand what specific item is needed
-3. Search through arrays intelligently based on the description and user's original intent
-4. Return the resolved input for {next_step.step_id}
-
-CRITICAL INSTRUCTIONS FOR ARRAY PLACEHOLDERS:
-- When you see {{{{step_X.array.0.field}}}}, DO NOT always pick index 0
-- Instead, analyze the step description and previous context to find the RIGHT item
-- Example: If step description is "Update Project Review event" and step_0 returned:
-  * events: [{{"id": "event_1", "title": "Team Meeting"}}, {{"id": "event_2", "title": "Project Review"}}]
-  * The placeholder {{{{step_0.events.0.id}}}} should resolve to "event_2" (not "event_1")
-  * Because the description mentions "Project Review"
-
-IMPORTANT:
-- If a placeholder describes a filter or search (e.g., "event where title='X'"), find the matching item
-- Use the step description as a guide for which item to select from arrays
-- Extract the exact field value requested (e.g., if placeholder asks for "id", return just the id)
-- Preserve all non-placeholder values as-is
-- If you cannot resolve a placeholder, keep it as-is and explain in reasoning
-
-Return ONLY valid JSON in this format:
-{{
-  "resolved_input": {{
-    // The complete input dict with all placeholders resolved
-    // Example: {{"event_id": "event_2", "updates": {{"end": "2024-03-20T16:00:00"}}}}
-  }},
-  "reasoning": "Brief explanation of how you resolved the placeholders"
-}}
-
-Return ONLY the JSON, no other text."""
+        # Joined once from fragments so large outputs are not copied into intermediate strings
+        prompt = "".join((
+            _RESOLUTION_HEADER,
+            "- Step ID: ", latest_result.step_id,
+            "\n- Tool: ", str(getattr(latest_result, "tool_name", "unknown")),
+            "\n- Output: ", latest_result.output_json_indented,
+            "\n\nALL COMPLETED STEPS (for reference):\n", self._format_all_step_results(all_results),
+            "\n", hitl_context,
+            "\nNEXT STEP TO EXECUTE:\n- Step ID: ", next_step.step_id,
+            "\n- Description: ", next_step.description,
+            "\n- Tool: ", next_step.tool_name,
+            "\n- Input (with placeholders): ", dumps_indent(next_step.input),
+            _RESOLUTION_TASK, next_step.step_id,
+            _RESOLUTION_INSTRUCTIONS,
+        ))
 
         try:
-            content = await self.llm_client.generate(
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=2048
-            )
-            content = content.strip()
+            messages = [{"role": "user", "content": prompt}]
+
+            # Stream the response and stop as soon as resolved_input is complete;
+            # the trailing reasoning is only needed when the early parse fails
+            parts = []
+            field = JsonFieldStream("resolved_input", loads=fast_loads)
+            async with aclosing(self._stream_llm(messages=messages, max_tokens=2048)) as stream:
+                async for chunk in stream:
+                    parts.append(chunk)
+                    if field.feed(chunk):
+                        break
 
-            # Extract JSON from markdown code blocks if present
-            json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', content, re.DOTALL)
-            if json_match:
-                content = json_match.group(1)
-
-            # Try to parse JSON first, only apply fix if parsing fails
-            try:
-                data = json.loads(content)
-                print(f"[Planner] Placeholder resolution JSON parsing successful")
-            except json.JSONDecodeError as e:
-                print(f"[Planner] Initial placeholder resolution JSON parsing failed: {str(e)}")
-                print(f"[Planner] Applying placeholder fix and retrying...")
-                content = self._fix_placeholders_in_json(content)
-                data = json.loads(content)
-                print(f"[Planner] Placeholder resolution JSON parsing successful after fix")
+            if field.done:
+                logger.debug("Placeholder resolution parsed while streaming")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("  Resolved input: %s", dumps_indent(field.value))
+                return field.value
+
+            content, data = self._parse_llm_json("".join(parts), "placeholder resolution")
 
             resolved_input = data.get("resolved_input")
             reasoning = data.get("reasoning", "")
 
-            print(f"[Planner] LLM resolved placeholders:")
-            print(f"[Planner]   Reasoning: {reasoning}")
-            print(f"[Planner]   Resolved input: {json.dumps(resolved_input, indent=2)}")
+            logger.debug("LLM resolved placeholders:")
+            logger.debug("  Reasoning: %s", reasoning)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  Resolved input: %s", dumps_indent(resolved_input))
 
             return resolved_input
 
         except json.JSONDecodeError as e:
-            print(f"[Planner] ERROR: Failed to parse LLM response as JSON")
-            print(f"[Planner] JSONDecodeError: {str(e)}")
-            print(f"[Planner] Response: {content}")
+            logger.error("Failed to parse LLM response as JSON: %s", e)
+            logger.debug("Response: %s", content)
             return None
         except Exception as e:
-            print(f"[Planner] ERROR: Failed to call LLM for placeholder resolution")
-            print(f"[Planner] Exception: {str(e)}")
-            import traceback
-            print(f"[Planner] Traceback:\n{traceback.format_exc()}")
+            logger.error("Failed to call LLM for placeholder resolution: %s", e)
+            logger.debug("Traceback", exc_info=True)
             return None
 
     def _format_all_step_results(self, results: AggregatedGroupResults) -> str:
         """Format all step results for LLM context"""
-        lines = []
+        completed_steps = results.completed_steps
+        if not completed_steps:
+            return "No previous steps"
+
+        # Completed outputs never change, so only steps completed since the last call
+        # are serialized when the cached ids are a prefix of the current ones
+        step_ids = tuple(step_result.step_id for step_result in completed_steps)
+        cached = self._step_results_cache.get(results.plan_id)
+        if cached is not None and step_ids[:len(cached[0])] == cached[0]:
+            done = len(cached[0])
+            if done == len(step_ids):
+                return cached[1]
+            parts = [cached[1]] if done else []
+        else:
+            done = 0
+            parts = []
 
-        for step_result in results.completed_steps:
-            lines.append(f"- {step_result.step_id}:")
-            lines.append(f"  Output: {json.dumps(step_result.output, indent=4)}")
+        parts.extend(
+            f"- {step_result.step_id}:\n  Output: {step_result.output_json_indented}"
+            for step_result in completed_steps[done:]
+        )
+        formatted = "\n".join(parts)
 
-        return "\n".join(lines) if lines else "No previous steps"
+        if results.plan_id not in self._step_results_cache and len(self._step_results_cache) >= 64:
+            # Drop the oldest plan (dicts keep insertion order)
+            del self._step_results_cache[next(iter(self._step_results_cache))]
+        self._step_results_cache[results.plan_id] = (step_ids, formatted)
+        return formatted
 
     def _fix_placeholders_in_json(self, content: str) -> str:
         """
@@ -1089,81 +1773,208 @@ Return ONLY the JSON, no other text."""
         - List of integers -> convert to list of strings
         - List of strings -> return as-is
         """
-        if deps is None or deps == [] or deps == "":
+        # Fast paths for the common LLM outputs: a plain list of 0-indexed step numbers
+        # or of step ids (exact type checks, so bools and subclasses take the full path)
+        if type(deps) is list:
+            if all(type(dep) is int for dep in deps):
+                return [_step_id(dep) for dep in deps]
+            if all(type(dep) is str for dep in deps):
+                return deps
+
+        # Empty lists took the fast path above
+        if deps is None or deps == "":
             return []
 
         # Single integer (e.g., 0) - treat as no dependencies
         if isinstance(deps, int):
-            print(f"[Planner]   Warning: Got integer dependency {deps}, treating as no dependencies")
+            logger.warning("Got integer dependency %s, treating as no dependencies", deps)
             return []
 
         # Single string - wrap in list
         if isinstance(deps, str):
             return [deps]
 
-        # List - normalize each element
+        # List - normalize each element in one pass, dropping unknown types
         if isinstance(deps, list):
-            normalized = []
-            for dep in deps:
-                if isinstance(dep, str):
-                    normalized.append(dep)
-                elif isinstance(dep, int):
-                    # Convert integer to step_id format (0-indexed)
-                    # LLM returns 0-based index (0 means step_0, 1 means step_1, etc.)
-                    step_id = f"step_{dep}"
-                    normalized.append(step_id)
-                    print(f"[Planner]   Info: Converted integer dependency {dep} to '{step_id}'")
-                else:
-                    print(f"[Planner]   Warning: Unknown dependency type {type(dep)}: {dep}")
+            normalized = [step_id for step_id in map(_dependency_step_id, deps) if step_id is not None]
+            if len(normalized) != len(deps):
+                for dep in deps:
+                    if not isinstance(dep, (str, int)):
+                        logger.warning("Unknown dependency type %s: %s", type(dep), dep)
             return normalized
 
         # Unknown type - return empty
-        print(f"[Planner]   Warning: Unknown dependencies type {type(deps)}: {deps}, treating as no dependencies")
+        logger.warning("Unknown dependencies type %s: %s, treating as no dependencies", type(deps), deps)
         return []
 
-    def _format_tools_for_prompt(self) -> str:
-        """Format available tools for prompt"""
-        lines = []
-        for tool in self.settings.available_tools:
-            lines.append(f"- {tool.name}: {tool.description}")
-        return "\n".join(lines)
+    def _now_strs(self) -> tuple[str, str]:
+        """
+        Get today's date and the current time formatted for prompts
 
-    def _format_tools_detailed(self) -> str:
-        """Format available tools in detailed JSON format for prompt"""
-        lines = []
-        for tool in self.settings.available_tools:
+        Returns:
+            Tuple of (today_str, current_time_str), cached for one second
+        """
+        now = time.monotonic()
+        cached = self._dt_cache
+        if cached is not None and now - cached[0] < 1.0:
+            return cached[1], cached[2]
+
+        current_datetime = datetime.now()
+        today_str = current_datetime.strftime("%Y-%m-%d (%A)")
+        current_time_str = current_datetime.strftime("%H:%M:%S")
+        self._dt_cache = (now, today_str, current_time_str)
+        return today_str, current_time_str
+
+    def _plan_cache_scope(self, state: State, *parts: str) -> Optional[str]:
+        """
+        Build the plan cache scope for a request
+
+        Requests that follow earlier conversation turns or mention the current
+        time are always planned fresh.
+
+        Args:
+            state: Current state
+            *parts: Additional prompt inputs the plan depends on
+
+        Returns:
+            Scope fingerprint, or None if the request must not be cached
+        """
+        if not self.settings.plan_cache_enabled:
+            return None
+        context = state.context
+        if context and (len(context.conversation_history) > 1
+                        or any(context.additional_context.values())):
+            return None
+        if not PlanCache.is_cacheable(state.request_text):
+            return None
+        # Entries may be persisted and shared, so plans are never reused across users
+        return PlanCache.make_scope(state.tenant, state.user_id, self._tools_fingerprint, *parts)
+
+    def _load_tools(self) -> None:
+        """Format the available tools and derive everything that depends on them"""
+        self._tools_prompt, self._tools_detailed = self._format_tools()
+        self._tools_fingerprint = hashlib.sha256(self._tools_detailed.encode()).hexdigest()
+
+        # Static system prompts: instructions plus tool definitions, a prefix the provider can cache
+        tools_block = "Available tools (you MUST use these exact tool names):\n" + self._tools_detailed
+        self._plan_system = _PLAN_INSTRUCTIONS + "\n" + tools_block
+        self._decision_system = _DECISION_INSTRUCTIONS + "\n" + tools_block
+
+        # Tool names a plan may use
+        self._tool_names: frozenset[str] = frozenset(tool.name for tool in self.settings.available_tools)
+
+        # Answer to a tool list request
+        self._tools_message, self._tools_data = self._format_tools_listing()
+
+    def _answer_tool_list_request(self, state: State) -> State:
+        """Return the pre-formatted tool listing as final response"""
+        state.type = StateType.FINAL
+        state.final_payload = {
+            "message": self._tools_message,
+            "data": {
+                "tool_count": len(self._tools_data),
+                "tools": list(self._tools_data)
+            }
+        }
+        return state
+
+    def _format_tools_listing(self) -> tuple[str, tuple[dict, ...]]:
+        """
+        Format the available tools for a tool list request
+
+        Returns:
+            Tuple of (markdown message for the user, tool definitions for the response data)
+        """
+        lines = ["Here are the tools I have access to:\n"]
+        for i, tool in enumerate(self.settings.available_tools, 1):
+            lines.append(f"{i}. **{tool.name}**: {tool.description}")
+            if tool.input_schema and tool.input_schema.get('properties'):
+                lines.append("   Parameters:")
+                properties = tool.input_schema['properties']
+                required = tool.input_schema.get('required', [])
+                for prop_name, prop_details in properties.items():
+                    req_marker = " (required)" if prop_name in required else " (optional)"
+                    prop_desc = prop_details.get('description', prop_details.get('type', ''))
+                    lines.append(f"   - {prop_name}{req_marker}: {prop_desc}")
+            lines.append("")
+        message = "\n".join(lines) + "\n"
+
+        data = tuple(
+            {
+                "name": tool.name,
+                "description": tool.description,
+                "input_schema": tool.input_schema
+            }
+            for tool in self.settings.available_tools
+        )
+        return message, data
+
+    def invalidate_tools_cache(self) -> None:
+        """
+        Re-format the tools after settings.available_tools was changed in place
+
+        Cached plans and LLM responses are keyed by the tools, so they are not reused
+        for the new tool set.
+        """
+        self._load_tools()
+
+    def _format_tools(self) -> tuple[str, str]:
+        """
+        Format available tools for prompts, shared between planners with the same tools
+
+        Returns:
+            Tuple of (short tools description, detailed tools JSON)
+        """
+        tools = self.settings.available_tools
+        # Schemas are part of the key: servers can expose the same name and description
+        # with different parameters, and the catalog feeds the tools fingerprint
+        tools_sig = tuple(
+            (tool.name, tool.description, fast_dumps(tool.input_schema) if tool.input_schema else "")
+            for tool in tools
+        )
+        cached = _tools_fmt_cache.get(tools_sig)
+        if cached is not None:
+            return cached
+
+        short_lines = []
+        detailed_lines = []
+        for tool in tools:
+            short_lines.append(f"- {tool.name}: {tool.description}")
             tool_dict = {
                 "name": tool.name,
                 "description": tool.description
             }
             if tool.input_schema:
                 tool_dict["input_schema"] = tool.input_schema
-            lines.append("    " + json.dumps(tool_dict, indent=4).replace("\n", "\n    "))
-        return ",\n".join(lines)
+            # Non-ASCII descriptions stay readable instead of costing tokens as \u escapes
+            detailed_lines.append("    " + dumps_indent(tool_dict).replace("\n", "\n    "))
+
+        # Tools rarely change; drop stale formats instead of growing without bound
+        if len(_tools_fmt_cache) >= 8:
+            _tools_fmt_cache.clear()
+        formatted = ("\n".join(short_lines), ",\n".join(detailed_lines))
+        _tools_fmt_cache[tools_sig] = formatted
+        return formatted
+
+    def _format_tools_for_prompt(self) -> str:
+        """Format available tools for prompt"""
+        return self._tools_prompt
+
+    def _format_tools_detailed(self) -> str:
+        """Format available tools in detailed JSON format for prompt"""
+        return self._tools_detailed
 
     def _format_context(self, context: Optional[ContextBundle]) -> str:
         """Format context for prompt"""
         if not context:
             return "No additional context"
 
-        lines = []
-        if context.conversation_history:
-            lines.append("Conversation history:")
-            for msg in context.conversation_history[-5:]:  # Last 5 messages
-                lines.append(f"  - {msg}")
-
-        if context.additional_context:
-            # Handle recent_results separately for better formatting
-            recent_results = context.additional_context.get("recent_results")
-            other_context = {k: v for k, v in context.additional_context.items()
-                           if k not in ["recent_results", "recent_plan_id", "recent_request"]}
-
-            if other_context:
-                lines.append("Additional context:")
-                for key, value in other_context.items():
-                    lines.append(f"  - {key}: {value}")
-
-        return "\n".join(lines) if lines else "No additional context"
+        # Handle recent_results separately for better formatting
+        other_context = tuple(
+            (k, str(v)) for k, v in context.additional_context.items()
+            if k not in ["recent_results", "recent_plan_id", "recent_request"]
+        )
+        return _format_context_lines(tuple(context.conversation_history[-5:]), other_context)
 
     async def _format_recent_execution_results(self, context: Optional[ContextBundle]) -> str:
         """Format recent execution results from previous plans"""
@@ -1178,6 +1989,15 @@ Return ONLY the JSON, no other text."""
             if not recent_results:
                 return ""
 
+            cached = self._recent_results_cache
+            if (
+                cached is not None
+                and cached[0] is context
+                and cached[1] is recent_results
+                and cached[2] is recent_request
+            ):
+                return cached[3]
+
             lines = [
                 "Recent execution results (from previous request):",
                 f"  Previous request: {recent_request}",
@@ -1192,9 +2012,11 @@ Return ONLY the JSON, no other text."""
                         output_preview += "..."
                     lines.append(f"    - {result.get('description', 'Unknown')}: {output_preview}")
 
-            return "\n".join(lines)
+            formatted = "\n".join(lines)
+            self._recent_results_cache = (context, recent_results, recent_request, formatted)
+            return formatted
         except Exception as e:
-            print(f"[Planner] Error formatting recent execution results: {e}")
+            logger.warning("Error formatting recent execution results: %s", e)
             return ""
 
     def _format_results(self, results: AggregatedGroupResults, plan: Optional[Plan]) -> str:
@@ -1208,28 +2030,33 @@ Return ONLY the JSON, no other text."""
             "Completed steps:"
         ]
 
-        for step_result in results.completed_steps:
-            lines.append(f"  - {step_result.step_id}: {step_result.output}")
+        # Older steps are rarely needed to decide, and large outputs only inflate the prompt
+        completed_steps = results.completed_steps
+        if len(completed_steps) > _MAX_RESULT_STEPS:
+            lines.append(f"  ({len(completed_steps) - _MAX_RESULT_STEPS} earlier steps omitted)")
+            completed_steps = completed_steps[-_MAX_RESULT_STEPS:]
+        lines.extend(
+            f"  - {step_result.step_id}: {_truncate(str(step_result.output), _MAX_OUTPUT_CHARS)}"
+            for step_result in completed_steps
+        )
 
         if results.failed_steps:
             lines.append("")
             lines.append("Failed steps:")
-            for step_result in results.failed_steps:
-                lines.append(f"  - {step_result.step_id}: {step_result.error}")
+            lines.extend(f"  - {step_result.step_id}: {step_result.error}" for step_result in results.failed_steps)
 
         # Add pending steps (not yet executed)
         if plan:
-            completed_step_ids = {step.step_id for step in results.completed_steps}
-            failed_step_ids = {step.step_id for step in results.failed_steps}
-            pending_steps = [
-                step for step in plan.steps
-                if step.step_id not in completed_step_ids and step.step_id not in failed_step_ids
+            executed_step_ids = results.completed_ids | results.failed_ids
+            pending_lines = [
+                f"  - {step.step_id}: {step.description} (tool: {step.tool_name})"
+                for step in plan.steps
+                if step.step_id not in executed_step_ids
             ]
 
-            if pending_steps:
+            if pending_lines:
                 lines.append("")
                 lines.append("Pending steps (already planned, not yet executed):")
-                for step in pending_steps:
-                    lines.append(f"  - {step.step_id}: {step.description} (tool: {step.tool_name})")
+                lines.extend(pending_lines)
 
         return "\n".join(lines)
@@ -4,13 +4,32 @@ Settings Manager - Manages user settings with SQLite storage
 
 import sqlite3
 import os
+import threading
 import json
 import base64
+import binascii
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Dict, Any
-from cryptography.fernet import Fernet
+from typing import Optional, Dict, Any, Iterator, Tuple
+from cryptography.fernet import Fernet, InvalidToken
 from pydantic import BaseModel
 
+# Per-connection PRAGMAs; journal_mode=WAL persists in the database file and
+# is set once in _initialize_database
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=1073741824",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA busy_timeout=30000",
+)
+
+# Decrypted LLM settings by (database path, user_id, tenant), None when the
+# user has none. Module level so that the API server, ConfigLoader and
+# ChatTracker instances see each other's saves and deletes.
+_llm_settings_cache: Dict[Tuple[str, str, str], Optional["LLMSettings"]] = {}
+_llm_settings_lock = threading.RLock()
+
 
 class LLMSettings(BaseModel):
     """LLM Settings model"""
@@ -58,8 +77,19 @@ class SettingsManager:
         self.db_path = db_path
         self.encryption_key = self._get_or_create_encryption_key()
         self.cipher = Fernet(self.encryption_key)
+        # One connection shared by all threads; the lock serializes access and
+        # transactions are explicit since isolation_level=None is autocommit
+        self._lock = threading.Lock()
+        self._conn = self._configure_connection(
+            sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        )
         self._initialize_database()
 
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
     def _get_or_create_encryption_key(self) -> bytes:
         """Get or create encryption key for API keys"""
         project_root = Path(__file__).parent.parent.parent
@@ -78,11 +108,51 @@ class SettingsManager:
             os.chmod(key_file, 0o600)
             return key
 
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+        """
+        Apply the per-connection PRAGMAs
+
+        WAL with synchronous=NORMAL turns each commit into one sequential
+        append instead of two fsyncs, and lets readers run while a write is
+        in progress.
+
+        Args:
+            conn: Freshly opened SQLite connection
+
+        Returns:
+            The same connection
+        """
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Lock the shared connection and yield a cursor for reads"""
+        with self._lock:
+            yield self._conn.cursor()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Lock the shared connection and yield a cursor inside BEGIN/COMMIT"""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+
     def _initialize_database(self):
         """Initialize SQLite database with settings table"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._cursor() as cursor:
+            # Must run outside a transaction
+            cursor.execute("PRAGMA journal_mode=WAL")
 
+        with self._transaction() as cursor:
             # Create LLM settings table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS llm_settings (
@@ -123,7 +193,6 @@ class SettingsManager:
                 migrations_performed.append("timeout")
 
             if migrations_performed:
-                conn.commit()
                 print(f"✅ Database migration complete: Added columns {', '.join(migrations_performed)}")
 
             # Create index for faster lookups
@@ -195,18 +264,48 @@ class SettingsManager:
                 ON chat_history(user_id, tenant, created_at)
             """)
 
-            conn.commit()
+            self._migrate_legacy_api_keys(cursor)
+
+    def _migrate_legacy_api_keys(self, cursor: sqlite3.Cursor):
+        """
+        Strip the extra base64 layer from API keys stored by older versions
+
+        Fernet tokens are already urlsafe base64 and always start with
+        "gAAAAA" (version byte 0x80), so only rows without that prefix are
+        legacy and need rewriting; migrated databases select nothing.
+
+        Args:
+            cursor: Cursor inside the initialization transaction
+        """
+        cursor.execute("""
+            SELECT id, api_key_encrypted FROM llm_settings
+            WHERE api_key_encrypted NOT LIKE 'gAAAAA%'
+        """)
+        migrated = 0
+
+        for row_id, legacy_key in cursor.fetchall():
+            try:
+                token = base64.b64decode(legacy_key.encode("ascii"), validate=True)
+                self.cipher.decrypt(token)
+            except (binascii.Error, UnicodeEncodeError, InvalidToken):
+                print(f"⚠️  Skipping API key migration for llm_settings row {row_id}: cannot decrypt")
+                continue
+            cursor.execute(
+                "UPDATE llm_settings SET api_key_encrypted = ? WHERE id = ?",
+                (token.decode("ascii"), row_id)
+            )
+            migrated += 1
+
+        if migrated:
+            print(f"✅ Database migration complete: Re-encoded {migrated} API key(s)")
 
     def _encrypt_api_key(self, api_key: str) -> str:
         """Encrypt API key"""
-        encrypted = self.cipher.encrypt(api_key.encode())
-        return base64.b64encode(encrypted).decode()
+        return self.cipher.encrypt(api_key.encode()).decode("ascii")
 
     def _decrypt_api_key(self, encrypted_key: str) -> str:
         """Decrypt API key"""
-        encrypted_bytes = base64.b64decode(encrypted_key.encode())
-        decrypted = self.cipher.decrypt(encrypted_bytes)
-        return decrypted.decode()
+        return self.cipher.decrypt(encrypted_key.encode("ascii")).decode()
 
     def save_llm_settings(
         self,
@@ -222,9 +321,7 @@ class SettingsManager:
         """Save LLM settings for a user"""
         encrypted_key = self._encrypt_api_key(api_key)
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with _llm_settings_lock, self._transaction() as cursor:
             # Upsert (insert or update)
             cursor.execute("""
                 INSERT INTO llm_settings (user_id, tenant, provider, api_key_encrypted, model, base_url, max_retries, timeout)
@@ -238,16 +335,39 @@ class SettingsManager:
                     timeout = excluded.timeout,
                     updated_at = CURRENT_TIMESTAMP
             """, (user_id, tenant, provider, encrypted_key, model, base_url, max_retries, timeout))
-
-            conn.commit()
+            _llm_settings_cache.pop(self._settings_cache_key(user_id, tenant), None)
 
         return True
 
+    def _settings_cache_key(self, user_id: str, tenant: str) -> Tuple[str, str, str]:
+        """Key of a user's entry in the decrypted LLM settings cache"""
+        return (os.path.realpath(self.db_path), user_id, tenant)
+
     def get_llm_settings(self, user_id: str, tenant: str) -> Optional[LLMSettings]:
-        """Get LLM settings for a user"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        """
+        Get LLM settings for a user
+
+        Decrypted settings are cached until the next save or delete, so the
+        per-request lookup skips the query and the Fernet decrypt.
+
+        Args:
+            user_id: User identifier
+            tenant: Tenant identifier
+
+        Returns:
+            A copy of the user's settings, or None if none are saved
+        """
+        key = self._settings_cache_key(user_id, tenant)
+        with _llm_settings_lock:
+            if key in _llm_settings_cache:
+                settings = _llm_settings_cache[key]
+            else:
+                settings = _llm_settings_cache[key] = self._fetch_llm_settings(user_id, tenant)
+        return settings.model_copy() if settings else None
 
+    def _fetch_llm_settings(self, user_id: str, tenant: str) -> Optional[LLMSettings]:
+        """Read and decrypt LLM settings for a user from the database"""
+        with self._cursor() as cursor:
             cursor.execute("""
                 SELECT provider, api_key_encrypted, model, base_url, max_retries, timeout
                 FROM llm_settings
@@ -273,16 +393,14 @@ class SettingsManager:
 
     def delete_llm_settings(self, user_id: str, tenant: str) -> bool:
         """Delete LLM settings for a user"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with _llm_settings_lock, self._transaction() as cursor:
             cursor.execute("""
                 DELETE FROM llm_settings
                 WHERE user_id = ? AND tenant = ?
             """, (user_id, tenant))
 
             deleted = cursor.rowcount > 0
-            conn.commit()
+            _llm_settings_cache.pop(self._settings_cache_key(user_id, tenant), None)
 
         return deleted
 
@@ -388,9 +506,7 @@ class SettingsManager:
         args_json = json.dumps(args or [])
         env_vars_json = json.dumps(env_vars or {})
 
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._transaction() as cursor:
             cursor.execute("""
                 INSERT INTO mcp_server_settings (user_id, tenant, server_name, enabled, transport, url, command, args, env_vars)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
@@ -404,8 +520,6 @@ class SettingsManager:
                     updated_at = CURRENT_TIMESTAMP
             """, (user_id, tenant, server_name, int(enabled), transport, url, command, args_json, env_vars_json))
 
-            conn.commit()
-
         return True
 
     def get_mcp_server_settings(
@@ -415,9 +529,7 @@ class SettingsManager:
         server_name: str
     ) -> Optional[MCPServerSettings]:
         """Get MCP server settings"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._cursor() as cursor:
             cursor.execute("""
                 SELECT server_name, enabled, transport, url, command, args, env_vars
                 FROM mcp_server_settings
@@ -442,9 +554,7 @@ class SettingsManager:
 
     def get_all_mcp_servers(self, user_id: str, tenant: str) -> list[MCPServerSettings]:
         """Get all MCP server settings for a user"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._cursor() as cursor:
             cursor.execute("""
                 SELECT server_name, enabled, transport, url, command, args, env_vars
                 FROM mcp_server_settings
@@ -473,16 +583,13 @@ class SettingsManager:
         server_name: str
     ) -> bool:
         """Delete MCP server settings"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._transaction() as cursor:
             cursor.execute("""
                 DELETE FROM mcp_server_settings
                 WHERE user_id = ? AND tenant = ? AND server_name = ?
             """, (user_id, tenant, server_name))
 
             deleted = cursor.rowcount > 0
-            conn.commit()
 
         return deleted
 
@@ -496,16 +603,12 @@ class SettingsManager:
         content: str
     ) -> bool:
         """Save a chat message to history"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._transaction() as cursor:
             cursor.execute("""
                 INSERT INTO chat_history (session_id, user_id, tenant, role, content)
                 VALUES (?, ?, ?, ?, ?)
             """, (session_id, user_id, tenant, role, content))
 
-            conn.commit()
-
         return True
 
     def get_chat_history(
@@ -514,9 +617,7 @@ class SettingsManager:
         limit: Optional[int] = None
     ) -> list[ChatMessage]:
         """Get chat history for a session"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._cursor() as cursor:
             if limit:
                 # Get last N messages
                 cursor.execute("""
@@ -558,30 +659,24 @@ class SettingsManager:
 
     def delete_chat_history(self, session_id: str) -> bool:
         """Delete all chat history for a session"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._transaction() as cursor:
             cursor.execute("""
                 DELETE FROM chat_history
                 WHERE session_id = ?
             """, (session_id,))
 
             deleted = cursor.rowcount > 0
-            conn.commit()
 
         return deleted
 
     def delete_all_chat_history(self, user_id: str, tenant: str) -> bool:
         """Delete all chat history for a user/tenant"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._transaction() as cursor:
             cursor.execute("""
                 DELETE FROM chat_history
                 WHERE user_id = ? AND tenant = ?
             """, (user_id, tenant))
 
             deleted = cursor.rowcount > 0
-            conn.commit()
 
         return deleted
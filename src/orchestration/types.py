@@ -4,8 +4,11 @@ Core types and data models for the Orchestration system
 
 from datetime import datetime
 from enum import Enum
+from functools import cached_property
 from typing import Any, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, computed_field
+
+from .json_utils import dumps_indent
 
 
 class StateType(str, Enum):
@@ -49,6 +52,9 @@ class OrchestrationSettings(BaseModel):
     max_retries: int = 3
     timeout: int = 30000
     available_tools: list[ToolDefinition]
+    parallel_resolution: bool = False  # Resolve placeholders of all ready steps concurrently
+    plan_cache_enabled: bool = True  # Reuse planning responses for repeated requests
+    plan_cache_path: Optional[str] = None  # SQLite file persisting the plan cache; in-memory if None
 
 
 class Step(BaseModel):
@@ -70,9 +76,16 @@ class Plan(BaseModel):
     """Execution plan"""
     plan_id: str
     steps: list[Step]
-    dependencies: dict[str, list[str]] = Field(default_factory=dict)
     guards: list[Guard] = Field(default_factory=list)
 
+    # Derived from the steps, which are updated in place, so it is never stale;
+    # still serialized for consumers of the plan JSON
+    @computed_field
+    @property
+    def dependencies(self) -> dict[str, list[str]]:
+        """Step ID -> IDs of the steps it depends on"""
+        return {step.step_id: step.dependencies for step in self.steps}
+
 
 class StepResult(BaseModel):
     """Step execution result"""
@@ -83,6 +96,12 @@ class StepResult(BaseModel):
     executed_at: datetime
     duration: float  # milliseconds
 
+    # Outputs never change once a step has completed, so they are serialized once per result
+    @cached_property
+    def output_json_indented(self) -> str:
+        """Output as indented JSON for LLM prompts"""
+        return dumps_indent(self.output)
+
 
 class AggregatedGroupResults(BaseModel):
     """Aggregated results for a group of steps"""
@@ -92,6 +111,17 @@ class AggregatedGroupResults(BaseModel):
     total_steps: int
     success_rate: float
 
+    # Results are snapshots rebuilt by the tracker, so the id sets are computed once
+    @cached_property
+    def completed_ids(self) -> frozenset[str]:
+        """Step IDs of completed steps"""
+        return frozenset(step.step_id for step in self.completed_steps)
+
+    @cached_property
+    def failed_ids(self) -> frozenset[str]:
+        """Step IDs of failed steps"""
+        return frozenset(step.step_id for step in self.failed_steps)
+
 
 class Decision(BaseModel):
     """Decision from Planner"""
@@ -3,6 +3,8 @@ Validators for input parameters
 """
 
 import re
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Tuple
 
 
@@ -61,40 +63,49 @@ def extract_missing_params(error_message: str) -> dict:
     Returns:
         Dictionary with missing parameter information
     """
+    # Copied so callers may modify the result without touching the cached entry
+    return dict(_missing_params_for(error_message))
+
+
+@lru_cache(maxsize=256)
+def _missing_params_for(error_message: str) -> MappingProxyType:
+    """Classify an error message once; validation errors repeat identically across retries"""
+    lowered = error_message.lower()
+
     # Check if it's an email validation error
-    if "email" in error_message.lower():
-        if "template variable" in error_message.lower():
-            return {
+    if "email" in lowered:
+        if "template variable" in lowered:
+            return MappingProxyType({
                 "param_name": "to",
                 "param_type": "email",
                 "reason": "unresolved_template",
                 "question": "이메일을 보내려면 받는 사람의 이메일 주소가 필요합니다. 누구에게 보낼까요?"
-            }
-        elif "placeholder domain" in error_message.lower():
-            return {
+            })
+        elif "placeholder domain" in lowered:
+            return MappingProxyType({
                 "param_name": "to",
                 "param_type": "email",
                 "reason": "placeholder_domain",
                 "question": "정확한 이메일 주소를 알 수 없습니다. 받는 사람의 이메일 주소를 입력해주세요."
-            }
-        elif "required" in error_message.lower():
-            return {
+            })
+        elif "required" in lowered:
+            return MappingProxyType({
                 "param_name": "to",
                 "param_type": "email",
                 "reason": "missing",
                 "question": "이메일을 보내려면 받는 사람의 이메일 주소가 필요합니다. 누구에게 보낼까요?"
-            }
-        elif "invalid" in error_message.lower():
-            return {
+            })
+        elif "invalid" in lowered:
+            return MappingProxyType({
                 "param_name": "to",
                 "param_type": "email",
                 "reason": "invalid_format",
                 "question": f"유효하지 않은 이메일 주소입니다. 올바른 이메일 주소를 입력해주세요."
-            }
+            })
 
-    return {
+    return MappingProxyType({
         "param_name": "unknown",
         "param_type": "unknown",
         "reason": "validation_failed",
         "question": "입력값이 유효하지 않습니다. 다시 시도해주세요."
-    }
+    })
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for building plan steps from parsed LLM output
+"""
+
+import sys
+import os
+
+import pydantic
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.planner import _build_step
+from orchestration.types import Step
+
+
+def test_parsed_steps_match_validated_steps():
+    """Test that the unvalidated fast path builds the same step as validation"""
+    print("\n=== Test 1: Well-typed step data ===")
+    step = _build_step('step_1', 'send_email', {'to': '{{step_0.email}}'}, 'Send email', ['step_0'])
+    expected = Step(
+        step_id='step_1', tool_name='send_email', input={'to': '{{step_0.email}}'},
+        description='Send email', dependencies=['step_0']
+    )
+    assert step == expected, step
+    assert step.model_dump() == expected.model_dump()
+    print("✓ Fast path matches a validated step")
+
+
+def test_mistyped_step_data():
+    """Test that step data with unusable types is still rejected"""
+    print("\n=== Test 2: Mistyped step data ===")
+    for tool_name, step_input, description in (
+        ('send_email', 'to=a@example.com', 'Send email'),
+        (None, {}, 'Send email'),
+        ('send_email', {}, None),
+    ):
+        try:
+            _build_step('step_0', tool_name, step_input, description, [])
+            assert False, "expected ValidationError"
+        except pydantic.ValidationError:
+            pass
+    print("✓ Unusable types raise ValidationError")
+
+    print("\n=== Test 3: Non-string step id or dependencies ===")
+    for step_id, dependencies in ((3, []), (None, []), ('step_1', [0]), ('step_1', [None])):
+        try:
+            _build_step(step_id, 'send_email', {}, 'Send email', dependencies)
+            assert False, f"expected ValidationError for {step_id!r}, {dependencies!r}"
+        except pydantic.ValidationError:
+            pass
+    print("✓ Retried step ids from the LLM are validated")
+
+
+if __name__ == '__main__':
+    test_parsed_steps_match_validated_steps()
+    test_mistyped_step_data()
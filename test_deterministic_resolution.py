@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for deterministic placeholder resolution in the Planner
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.planner import Planner
+from orchestration.types import AggregatedGroupResults, OrchestrationSettings, Step, StepResult
+
+
+def make_planner_and_results():
+    """Create a planner and results with one completed step"""
+    planner = Planner(OrchestrationSettings(llm_api_key='test', llm_model='test', available_tools=[]))
+    step_0 = StepResult(
+        step_id='step_0',
+        status='success',
+        output={
+            'event': {'id': 'event_2', 'title': 'Project Review', 'attendees': ['a@example.com']},
+            'events': [{'id': 'event_1'}, {'id': 'event_2'}]
+        },
+        executed_at=datetime.now(),
+        duration=1.0
+    )
+    results = AggregatedGroupResults(
+        plan_id='plan', completed_steps=[step_0], failed_steps=[], total_steps=2, success_rate=0.5
+    )
+    return planner, results
+
+
+def resolve(planner, results, step_input):
+    step = Step(step_id='step_1', tool_name='update_event', input=step_input, description='Update event')
+    return planner._try_deterministic_resolve(step, results)
+
+
+def test_field_references_resolve_without_llm():
+    """Test that plain field references are resolved directly"""
+    planner, results = make_planner_and_results()
+
+    print("\n=== Test 1: Whole-string and embedded references ===")
+    resolved = resolve(planner, results, {
+        'event_id': '{{step_0.event.id}}',
+        'attendees': '{{step_0.event.attendees}}',
+        'note': 'Moved {{step_0.event.title}} to Friday',
+        'notify': True
+    })
+    assert resolved == {
+        'event_id': 'event_2',
+        'attendees': ['a@example.com'],
+        'note': 'Moved Project Review to Friday',
+        'notify': True
+    }, resolved
+    print("✓ References resolved with their original types")
+
+
+def test_ambiguous_placeholders_need_llm():
+    """Test that array indexes, expressions and missing paths fall back to the LLM"""
+    planner, results = make_planner_and_results()
+
+    print("\n=== Test 2: Placeholders left to the LLM ===")
+    assert resolve(planner, results, {'event_id': '{{step_0.events.0.id}}'}) is None
+    assert resolve(planner, results, {'attendees': "{{step_0.event.attendees + ['b@example.com']}}"}) is None
+    assert resolve(planner, results, {'event_id': '{{step_0.event.missing}}'}) is None
+    assert resolve(planner, results, {'event_id': '{{step_5.id}}'}) is None
+    print("✓ Ambiguous placeholders are not resolved deterministically")
+
+
+if __name__ == '__main__':
+    test_field_references_resolve_without_llm()
+    test_ambiguous_placeholders_need_llm()
@@ -82,6 +82,13 @@ def test_extract_missing_params():
         print(f"  Reason: {result.get('reason')}")
         print(f"  Question: {result.get('question')}")
 
+    # Repeated errors are served from the cache as independent copies
+    first = extract_missing_params(test_cases[0])
+    first["question"] = "changed"
+    assert extract_missing_params(test_cases[0])["reason"] == "unresolved_template"
+    assert extract_missing_params(test_cases[0])["question"] != "changed"
+    print("\n✓ Cached results are copied per call")
+
     print("\n" + "=" * 80)
 
 
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for JsonArrayStream and JsonFieldStream incremental parsing
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.json_stream import JsonArrayStream, JsonFieldStream
+
+
+def feed_in_chunks(text: str, size: int) -> JsonArrayStream:
+    """Feed text to a new stream in fixed-size chunks"""
+    stream = JsonArrayStream()
+    for i in range(0, len(text), size):
+        stream.feed(text[i:i + size])
+    return stream
+
+
+def test_array_items_across_chunks():
+    """Test that array items are parsed regardless of chunk boundaries"""
+    text = '```json\n[{"tool_name": "send_email", "input": {"body": "a, b ] } \\" c"}, "dependencies": [0]}, {"tool_name": "x"}]\n```'
+    expected = [
+        {"tool_name": "send_email", "input": {"body": 'a, b ] } " c'}, "dependencies": [0]},
+        {"tool_name": "x"},
+    ]
+
+    print("\n=== Test 1: Items split at every chunk size ===")
+    for size in range(1, len(text) + 1):
+        stream = feed_in_chunks(text, size)
+        assert stream.complete, size
+        assert stream.items == expected, (size, stream.items)
+    print("✓ Items parsed incrementally")
+
+
+def test_non_streamable_responses():
+    """Test that object roots and invalid items fall back to full parsing"""
+    print("\n=== Test 2: Object root ===")
+    stream = feed_in_chunks('{"type": "tool_list_request", "tools": []}', 7)
+    assert not stream.streamable and not stream.complete
+    print("✓ Object root is not streamed")
+
+    print("\n=== Test 3: Unquoted placeholder ===")
+    stream = feed_in_chunks('[{"input": {"to": {{step_0.email}}}}]', 5)
+    assert not stream.complete
+    print("✓ Invalid item falls back")
+
+    print("\n=== Test 4: Truncated array ===")
+    stream = feed_in_chunks('[{"a": 1}, {"b": 2}', 4)
+    assert stream.items == [{"a": 1}] and not stream.complete
+    print("✓ Truncated array is incomplete")
+
+
+def test_field_value_before_end_of_response():
+    """Test that a field value is parsed as soon as its object closes"""
+    text = '```json\n{"resolved_input": {"body": "a } \\" {", "to": {"id": 1}}, "reasoning": "unfinished'
+    expected = {"body": 'a } " {', "to": {"id": 1}}
+
+    print("\n=== Test 5: Field value split at every chunk size ===")
+    for size in range(1, len(text) + 1):
+        stream = JsonFieldStream("resolved_input")
+        for i in range(0, len(text), size):
+            if stream.feed(text[i:i + size]):
+                break
+        assert stream.done and stream.value == expected, (size, stream.value)
+    print("✓ Value parsed without the trailing reasoning")
+
+    print("\n=== Test 6: Unquoted placeholder ===")
+    stream = JsonFieldStream("resolved_input")
+    assert not stream.feed('{"resolved_input": {"to": {{step_0.email}}}}')
+    assert stream.failed
+    print("✓ Invalid value falls back")
+
+
+def test_field_after_long_prefix():
+    """Test that the key is found after other fields and each chunk is scanned once"""
+    reasoning = 'The "to" field needs step_0\'s "email". ' * 50
+    text = '{"reasoning": "%s", "resolved_input" :\n {"to": "a@example.com"}, "x": 1}' % reasoning
+
+    print("\n=== Test 7: Key after a long field, split at any chunk size ===")
+    for size in (1, 2, 3, 7, 64, len(text)):
+        stream = JsonFieldStream("resolved_input")
+        longest_head = 0
+        for i in range(0, len(text), size):
+            if stream.feed(text[i:i + size]):
+                break
+            longest_head = max(longest_head, len(stream._head))
+        assert stream.done and stream.value == {"to": "a@example.com"}, (size, stream.value)
+        assert longest_head <= size + len('"resolved_input" :\n '), (size, longest_head)
+    print("✓ Only a short tail is kept while looking for the key")
+
+
+if __name__ == '__main__':
+    test_array_items_across_chunks()
+    test_non_streamable_responses()
+    test_field_value_before_end_of_response()
+    test_field_after_long_prefix()
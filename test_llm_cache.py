@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test script for CachedLLMClient
+"""
+
+import asyncio
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.llm_client import CachedLLMClient, LLMClient
+
+
+class CountingClient(LLMClient):
+    """LLM client returning a numbered response per call"""
+
+    def __init__(self):
+        self.model = "test-model"
+        self.calls = 0
+
+    async def generate(self, messages, max_tokens=4096, system=None):
+        self.calls += 1
+        return f"response {self.calls}"
+
+
+def test_identical_requests_reuse_response():
+    """Test that identical requests are answered from the cache"""
+    async def run():
+        inner = CountingClient()
+        client = CachedLLMClient(inner)
+        messages = [{"role": "user", "content": "resolve {{step_0.id}}"}]
+
+        print("\n=== Test 1: Identical request ===")
+        assert await client.generate(messages, max_tokens=2048, cacheable=True) == "response 1"
+        assert await client.generate(messages, max_tokens=2048, cacheable=True) == "response 1"
+        assert inner.calls == 1
+        print("✓ Second call served from cache")
+
+        print("\n=== Test 2: Different prompt or max_tokens ===")
+        assert await client.generate(messages, max_tokens=1024, cacheable=True) == "response 2"
+        other = [{"role": "user", "content": "other"}]
+        assert await client.generate(other, max_tokens=2048, cacheable=True) == "response 3"
+        print("✓ Different requests reach the LLM")
+
+        print("\n=== Test 3: Discard ===")
+        client.discard(messages, max_tokens=2048)
+        assert await client.generate(messages, max_tokens=2048, cacheable=True) == "response 4"
+        print("✓ Discarded request reaches the LLM again")
+
+    asyncio.run(run())
+
+
+def test_lru_eviction():
+    """Test that the least recently used response is evicted"""
+    async def run():
+        inner = CountingClient()
+        client = CachedLLMClient(inner, max_entries=2)
+        first = [{"role": "user", "content": "first"}]
+        second = [{"role": "user", "content": "second"}]
+        third = [{"role": "user", "content": "third"}]
+
+        await client.generate(first, cacheable=True)
+        await client.generate(second, cacheable=True)
+        await client.generate(first, cacheable=True)  # first is now the most recent
+        await client.generate(third, cacheable=True)  # evicts second
+        assert inner.calls == 3
+        await client.generate(first, cacheable=True)
+        assert inner.calls == 3
+        await client.generate(second, cacheable=True)
+        assert inner.calls == 4
+        print("✓ Least recently used entry evicted")
+
+    asyncio.run(run())
+
+
+def test_streamed_responses():
+    """Test that only fully read streams are cached"""
+    async def run():
+        inner = CountingClient()
+        client = CachedLLMClient(inner)
+        messages = [{"role": "user", "content": "stream"}]
+
+        print("\n=== Test 4: Stream stopped early ===")
+        async for chunk in client.generate_stream(messages, cacheable=True):
+            break
+        client.store(messages, "stored")
+        assert [chunk async for chunk in client.generate_stream(messages, cacheable=True)] == ["stored"]
+        assert inner.calls == 1
+        print("✓ Stored response replaces the partial stream")
+
+        print("\n=== Test 5: Stream read to the end ===")
+        other = [{"role": "user", "content": "other"}]
+        assert [chunk async for chunk in client.generate_stream(other, cacheable=True)] == ["response 2"]
+        assert await client.generate(other, cacheable=True) == "response 2"
+        assert inner.calls == 2
+        print("✓ Completed stream served from cache")
+
+    asyncio.run(run())
+
+
+class SlowClient(CountingClient):
+    """LLM client that takes a while to respond and can be told to fail"""
+
+    def __init__(self):
+        super().__init__()
+        self.fail = False
+
+    async def generate(self, messages, max_tokens=4096, system=None):
+        self.calls += 1
+        fail = self.fail
+        await asyncio.sleep(0.05)
+        if fail:
+            raise RuntimeError("LLM unavailable")
+        return f"response {self.calls}"
+
+
+def test_concurrent_identical_requests():
+    """Test that identical requests in flight share one LLM call"""
+    async def run():
+        inner = SlowClient()
+        client = CachedLLMClient(inner)
+        messages = [{"role": "user", "content": "plan"}]
+
+        async def read_stream():
+            return "".join([chunk async for chunk in client.generate_stream(messages, cacheable=True)])
+
+        print("\n=== Test 6: Concurrent identical requests ===")
+        responses = await asyncio.gather(client.generate(messages, cacheable=True), read_stream(), read_stream())
+        assert responses == ["response 1"] * 3, responses
+        assert inner.calls == 1
+        print("✓ One LLM call answered all requests")
+
+        print("\n=== Test 7: Failed call in flight ===")
+        other = [{"role": "user", "content": "other"}]
+        inner.fail = True
+        first = asyncio.create_task(client.generate(other, cacheable=True))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(client.generate(other, cacheable=True))
+        await asyncio.sleep(0.01)
+        inner.fail = False
+        results = await asyncio.gather(first, second, return_exceptions=True)
+        assert isinstance(results[0], RuntimeError) and results[1] == "response 3", results
+        print("✓ Waiter calls the LLM itself after the first call failed")
+
+    asyncio.run(run())
+
+
+def test_non_cacheable_requests():
+    """Test that requests without cacheable=True always reach the LLM"""
+    async def run():
+        inner = CountingClient()
+        client = CachedLLMClient(inner)
+        messages = [{"role": "user", "content": "resolve {{step_0.id}} for send_email"}]
+
+        print("\n=== Test 8: Non-cacheable requests ===")
+        assert await client.generate(messages) == "response 1"
+        assert await client.generate(messages) == "response 2"
+        assert [chunk async for chunk in client.generate_stream(messages)] == ["response 3"]
+        assert inner.calls == 3
+        print("✓ Every call reaches the LLM")
+
+        print("\n=== Test 9: Cached response is not served to non-cacheable requests ===")
+        assert await client.generate(messages, cacheable=True) == "response 4"
+        assert await client.generate(messages) == "response 5"
+        assert inner.calls == 5
+        print("✓ Opting out bypasses the cache")
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    test_identical_requests_reuse_response()
+    test_lru_eviction()
+    test_streamed_responses()
+    test_concurrent_identical_requests()
+    test_non_cacheable_requests()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test script for normalizing plan step dependencies from LLM output
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.planner import Planner
+from orchestration.types import OrchestrationSettings
+
+
+def test_dependency_formats():
+    """Test that every dependency format the LLM produces becomes a list of step ids"""
+    planner = Planner(OrchestrationSettings(llm_api_key='test', llm_model='test', available_tools=[]))
+    normalize = planner._normalize_dependencies
+
+    print("\n=== Test 1: Lists ===")
+    assert normalize([0, 2]) == ['step_0', 'step_2']
+    assert normalize(['step_0', 'fetch_events']) == ['step_0', 'fetch_events']
+    assert normalize([1, 'step_0', None]) == ['step_1', 'step_0']
+    assert normalize([300]) == ['step_300']
+    print("✓ Step indexes are 0-based and unknown items are dropped")
+
+    print("\n=== Test 2: Scalars and empty values ===")
+    assert normalize('step_0') == ['step_0']
+    for deps in (None, [], '', 0, {'step': 0}):
+        assert normalize(deps) == [], deps
+    print("✓ Single ids are wrapped, everything else means no dependencies")
+
+
+if __name__ == '__main__':
+    test_dependency_formats()
@@ -212,6 +212,87 @@ def test_single_braces_and_array_indexing():
     print("\n=== All single braces and array indexing tests passed! ===")
 
 
+def test_copy_on_write_containers():
+    """Test that containers without placeholders are reused instead of copied"""
+    resolver = PlaceholderResolver()
+    resolver.register_step_result('step_0', {'id': 'event_1'})
+
+    print("\n=== Test: Copy-on-write containers ===")
+    untouched = {'options': {'notify': True}, 'tags': ['a', 'b']}
+    resolved = resolver._resolve_dict(untouched)
+    assert resolved is untouched, "Dict without placeholders should be returned as-is"
+
+    data = {
+        'options': {'notify': True},
+        'ids': ['fixed', '{{step_0.id}}'],
+        'title': 'Meeting'
+    }
+    resolved = resolver._resolve_dict(data)
+    assert resolved is not data, "Dict with placeholders should be copied"
+    assert resolved['options'] is data['options'], "Unchanged nested dict should be shared"
+    assert resolved['ids'] == ['fixed', 'event_1'], f"Got {resolved['ids']}"
+    assert data['ids'] == ['fixed', '{{step_0.id}}'], "Original input must not be mutated"
+    print("✓ Copy-on-write works!")
+
+
+
+def test_prewarm_parses_placeholders():
+    """Test that prewarm parses placeholders once, ahead of resolution"""
+    resolver = PlaceholderResolver()
+
+    print("\n=== Test: Prewarm placeholder parsing ===")
+    step = Step(
+        step_id='step_1',
+        tool_name='send_email',
+        input={
+            'to': '{{step_0.events[0].attendees.0}}',
+            'cc': ['${step_0.owner}'],
+            'subject': 'Plain subject'
+        },
+        description='Test prewarm',
+        dependencies=['step_0']
+    )
+    resolver.prewarm([step])
+    assert resolver._path_cache['step_0.events[0].attendees.0'] == \
+        ('step_0.events.0.attendees.0', ('step_0', 'events', '0', 'attendees', '0'))
+    assert 'step_0.owner' in resolver._path_cache
+
+    resolver.register_step_result('step_0', {
+        'owner': 'owner@company.com',
+        'events': [{'attendees': ['alice@company.com']}]
+    })
+    resolved = resolver.resolve_step_input(step)
+    assert resolved.input['to'] == 'alice@company.com', f"Got {resolved.input['to']}"
+    assert resolved.input['cc'] == ['owner@company.com'], f"Got {resolved.input['cc']}"
+    print("✓ Prewarm works!")
+
+
+
+def test_flattened_output_lookup():
+    """Test flattened step outputs and the fallback for outputs too large to flatten"""
+    resolver = PlaceholderResolver()
+    output = {'events': [{'id': 'event_1'}, {'id': 'event_2'}], 'dotted.key': 'skip'}
+    resolver.register_step_result('step_0', output)
+
+    print("\n=== Test: Flattened output lookup ===")
+    flat = resolver._flat_outputs['step_0']
+    assert flat['step_0'] is output
+    assert flat['step_0.events.1.id'] == 'event_2'
+    assert 'step_0.dotted.key' not in flat
+    assert resolver._get_placeholder_value('step_0.events.1.id') == 'event_2'
+
+    # Re-registering replaces the previous index
+    resolver.register_step_result('step_0', {'events': []})
+    assert resolver._get_placeholder_value('step_0.events.1.id') is None
+
+    # Outputs above the cap are resolved by walking the structure
+    large = {'items': list(range(PlaceholderResolver.MAX_FLATTEN_NODES + 1))}
+    resolver.register_step_result('step_1', large)
+    assert 'step_1' not in resolver._flat_outputs
+    assert resolver._get_placeholder_value('step_1.items.5') == 5
+    print("✓ Flattened output lookup works!")
+
+
 if __name__ == '__main__':
     print("="*60)
     print("Running original expression evaluation tests...")
@@ -222,3 +303,10 @@ if __name__ == '__main__':
     print("Running new single braces and array indexing tests...")
     print("="*60)
     test_single_braces_and_array_indexing()
+
+    print("\n" + "="*60)
+    print("Running copy-on-write tests...")
+    print("="*60)
+    test_copy_on_write_containers()
+    test_prewarm_parses_placeholders()
+    test_flattened_output_lookup()
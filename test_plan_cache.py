@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for PlanCache
+"""
+
+import sys
+import os
+import tempfile
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.plan_cache import PlanCache
+
+
+def test_exact_and_similar_hits():
+    """Test that repeated and near-identical requests reuse the cached plan"""
+    cache = PlanCache()
+    scope = PlanCache.make_scope("tools", "2025-11-20 (Thursday)")
+    cache.put(scope, "Send an email to John about the Q4 report", '[{"tool_name": "send_email"}]')
+
+    print("\n=== Test 1: Exact and normalized matches ===")
+    assert cache.get(scope, "Send an email to John about the Q4 report") is not None
+    assert cache.get(scope, "send an email to john about the q4 report!") is not None
+    print("✓ Exact matches hit")
+
+    print("\n=== Test 2: Filler words only ===")
+    assert cache.get(scope, "Please send an email to John about the Q4 report") is not None
+    print("✓ Similar request hits")
+
+    print("\n=== Test 3: Different entities never match ===")
+    assert cache.get(scope, "Send an email to Jane about the Q4 report") is None
+    assert cache.get(scope, "Send an email to John about the Q3 report") is None
+    print("✓ Different names and numbers miss")
+
+    print("\n=== Test 3b: Swapped arguments never match ===")
+    cache.put(scope, "Move the meeting from Monday to Tuesday", '[{"tool_name": "update_event"}]')
+    cache.put(scope, "Forward John's email to Jane", '[{"tool_name": "forward_email"}]')
+    assert cache.get(scope, "Move the meeting from Tuesday to Monday") is None
+    assert cache.get(scope, "Forward Jane's email to John") is None
+    assert cache.get(scope, "Send an email to me about the Q4 report") is None
+    assert cache.get(scope, "Please move the meeting from Monday to Tuesday") is not None
+    print("✓ Order and direction words are part of the match")
+
+    print("\n=== Test 3c: Exact matches only ===")
+    exact = PlanCache(similarity_threshold=None)
+    exact.put(scope, "Send an email to John about the Q4 report", '{"type": "final"}')
+    assert exact.get(scope, "send an email to john about the q4 report!") is not None
+    assert exact.get(scope, "Please send an email to John about the Q4 report") is None
+    assert (exact.exact_hits, exact.similar_hits, exact.misses) == (1, 0, 1)
+    print("✓ Similar requests miss when the similar tier is disabled")
+
+    print("\n=== Test 4: Different scope ===")
+    other_scope = PlanCache.make_scope("tools", "2025-11-21 (Friday)")
+    assert cache.get(other_scope, "Send an email to John about the Q4 report") is None
+    print("✓ Scopes are isolated")
+
+
+def test_volatile_requests_and_eviction():
+    """Test volatile request bypass and bounded size"""
+    assert not PlanCache.is_cacheable("What meetings do I have now?")
+    assert not PlanCache.is_cacheable("지금 일정 알려줘")
+    assert not PlanCache.is_cacheable("   ")
+    assert PlanCache.is_cacheable("내일 일정 알려줘")
+    for request in (
+        "Schedule a meeting in 2 hours", "Remind me in 30 minutes", "book lunch this afternoon",
+        "Call John tonight", "1시간 후에 회의 잡아줘", "30분 뒤에 알려줘", "오후에 점심 예약해줘", "지금은 뭐 해?",
+    ):
+        assert not PlanCache.is_cacheable(request), request
+    assert PlanCache.is_cacheable("Schedule a meeting on 2025-11-21 at 10:00")
+    assert PlanCache.is_cacheable("2시간짜리 회의를 내일 10시에 잡아줘")
+
+    cache = PlanCache(max_entries=2)
+    scope = PlanCache.make_scope("tools")
+    cache.put(scope, "first request", "1")
+    cache.put(scope, "second request", "2")
+    cache.put(scope, "third request", "3")
+    assert cache.get(scope, "first request") is None
+    assert cache.get(scope, "third request") == "3"
+    print("✓ Volatile requests bypass the cache and old entries are evicted")
+
+    cache.get(scope, "second request")  # second is now the most recent
+    cache.put(scope, "fourth request", "4")  # evicts third
+    assert cache.get(scope, "third request") is None
+    assert cache.get(scope, "second request") == "2"
+    assert (cache.exact_hits, cache.misses) == (3, 2)
+    print("✓ Least recently used entry evicted")
+
+
+def test_persisted_entries():
+    """Test that entries survive a restart when a database path is given"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "plan_cache.db")
+        scope = PlanCache.make_scope("tools")
+
+        print("\n=== Test 3: Reload from SQLite ===")
+        cache = PlanCache(max_entries=2, db_path=db_path)
+        cache.put(scope, "first request", "1")
+        cache.put(scope, "second request", "2")
+        cache.put(scope, "third request", "3")
+
+        reloaded = PlanCache(max_entries=2, db_path=db_path)
+        assert reloaded.get(scope, "first request") is None
+        assert reloaded.get(scope, "second request") == "2"
+        assert reloaded.get(scope, "third request") == "3"
+        print("✓ Most recent entries reloaded")
+
+        reloaded.clear()
+        assert PlanCache(db_path=db_path).get(scope, "third request") is None
+        print("✓ Clear removes persisted entries")
+
+
+if __name__ == '__main__':
+    test_exact_and_similar_hits()
+    test_volatile_requests_and_eviction()
+    test_persisted_entries()
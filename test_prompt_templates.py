@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script for the pre-split planner prompt templates
+"""
+
+import sys
+import os
+from string import Template
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.planner import (
+    Planner, _DECISION_PROMPT, _INITIAL_PROMPT, _PLAN_INSTRUCTIONS, _split_template
+)
+
+
+def render(parts, values):
+    """Build a prompt the way the planner does, with one join"""
+    pieces = [parts[0]]
+    for value, fragment in zip(values, parts[1:]):
+        pieces += [value, fragment]
+    return "".join(pieces)
+
+
+def test_join_matches_template_substitution():
+    """Test that the joined fragments render like string.Template"""
+    values = {
+        "today_str": "2025-11-20 (Thursday)",
+        "current_time_str": "09:30:00",
+        "request_text": "Email {{John}} about ${budget}",
+        "context_str": "No context",
+        "recent_results_str": "",
+        "results_summary": "step_0: success",
+    }
+
+    print("\n=== Test 1: Initial and decision prompts ===")
+    for template, parts in ((_INITIAL_PROMPT, Planner._INITIAL_PARTS), (_DECISION_PROMPT, Planner._DECISION_PARTS)):
+        names = [name for name in values if "${%s}" % name in template]
+        assert len(parts) == len(names) + 1
+        rendered = render(parts, [values[name] for name in names])
+        assert rendered == Template(template).substitute(values), rendered
+        assert "${" not in "".join(parts)
+    print("✓ One join renders the same prompt, request text is not re-substituted")
+
+    print("\n=== Test 2: Literal placeholders need no escaping ===")
+    assert "{{step_0.id}}" in _PLAN_INSTRUCTIONS
+    assert "{{{{" not in _PLAN_INSTRUCTIONS
+    print("✓ Step references appear verbatim")
+
+    print("\n=== Test 3: Missing placeholder ===")
+    try:
+        _split_template("no placeholders", "today_str")
+        assert False, "expected ValueError"
+    except ValueError:
+        print("✓ Missing placeholder rejected at import time")
+
+
+if __name__ == '__main__':
+    test_join_matches_template_substitution()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script for finding executable steps in the Planner
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.planner import Planner
+from orchestration.types import AggregatedGroupResults, OrchestrationSettings, Step, StepResult
+
+
+def make_step(step_id, dependencies):
+    return Step(step_id=step_id, tool_name='tool', input={}, description=step_id, dependencies=dependencies)
+
+
+def test_ready_set():
+    """Test that every pending step with completed dependencies is ready, in plan order"""
+    planner = Planner(OrchestrationSettings(llm_api_key='test', llm_model='test', available_tools=[]))
+    completed = [
+        StepResult(step_id=step_id, status='success', output={}, executed_at=datetime.now(), duration=1.0)
+        for step_id in ('step_0', 'fetch_events')
+    ]
+    results = AggregatedGroupResults(
+        plan_id='plan', completed_steps=completed, failed_steps=[], total_steps=6, success_rate=0.3
+    )
+    pending = [
+        make_step('step_2', ['step_0']),
+        make_step('step_3', ['step_2']),
+        make_step('step_4', []),
+        make_step('step_5', ['step_0', 'fetch_events']),
+        make_step('step_6', ['step_99']),
+    ]
+
+    print("\n=== Test 1: Ready steps ===")
+    ready = planner._find_all_executable_steps(pending, results)
+    assert [step.step_id for step in ready] == ['step_2', 'step_4', 'step_5'], ready
+    print("✓ Steps with satisfied dependencies are ready, including non step_N ids")
+
+
+if __name__ == '__main__':
+    test_ready_set()
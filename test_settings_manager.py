@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for SettingsManager storage
+"""
+
+import base64
+import os
+import sys
+import tempfile
+import threading
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.settings_manager import SettingsManager
+
+
+def make_manager(tmp_dir):
+    """Create a settings manager on a fresh database"""
+    return SettingsManager(db_path=os.path.join(tmp_dir, 'settings.db'))
+
+
+def test_wal_connection():
+    """Test that connections use WAL and the tuned PRAGMAs"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = make_manager(tmp_dir)
+
+        print("\n=== Test 1: Connection PRAGMAs ===")
+        with manager._cursor() as cursor:
+            assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert cursor.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+            assert cursor.execute("PRAGMA cache_size").fetchone()[0] == -65536
+            assert cursor.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+        manager.close()
+        print("✓ WAL journal with tuned PRAGMAs")
+
+
+def test_llm_settings_round_trip():
+    """Test saving, reading and deleting LLM settings"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = make_manager(tmp_dir)
+
+        print("\n=== Test 2: LLM settings round trip ===")
+        assert manager.get_llm_settings('u', 't') is None
+        manager.save_llm_settings('u', 't', 'anthropic', 'sk-test-1234', 'model-a')
+        settings = manager.get_llm_settings('u', 't')
+        assert settings.api_key == 'sk-test-1234' and settings.model == 'model-a'
+        manager.save_llm_settings('u', 't', 'openai', 'sk-test-5678', 'model-b')
+        assert manager.get_llm_settings('u', 't').model == 'model-b'
+        assert manager.delete_llm_settings('u', 't')
+        assert manager.get_llm_settings('u', 't') is None
+        manager.close()
+        print("✓ Saved, updated and deleted")
+
+
+def test_shared_connection_across_threads():
+    """Test that threads share the connection and failed writes roll back"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = make_manager(tmp_dir)
+
+        print("\n=== Test 3: Writes from several threads ===")
+        def write(n):
+            for i in range(20):
+                manager.save_chat_message(f's{n}', 'u', 't', 'user', f'message {i}')
+
+        threads = [threading.Thread(target=write, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(len(manager.get_chat_history(f's{n}')) == 20 for n in range(4))
+        print("✓ All writes committed")
+
+        print("\n=== Test 4: Failed transaction ===")
+        try:
+            with manager._transaction() as cursor:
+                cursor.execute("DELETE FROM chat_history")
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert len(manager.get_chat_history('s0')) == 20
+        assert not manager._conn.in_transaction
+        manager.close()
+        print("✓ Rolled back and connection reusable")
+
+
+def test_llm_settings_cache():
+    """Test that decrypted settings are cached and invalidated across instances"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        api_manager = make_manager(tmp_dir)
+        config_manager = make_manager(tmp_dir)
+        decrypts = []
+        decrypt = config_manager._decrypt_api_key
+        config_manager._decrypt_api_key = lambda key: decrypts.append(key) or decrypt(key)
+
+        print("\n=== Test 5: Repeated lookups ===")
+        api_manager.save_llm_settings('u', 't', 'anthropic', 'sk-test-1234', 'model-a')
+        first = config_manager.get_llm_settings('u', 't')
+        first.model = 'changed by caller'
+        assert config_manager.get_llm_settings('u', 't').model == 'model-a'
+        assert len(decrypts) == 1
+        print("✓ Decrypted once, callers get copies")
+
+        print("\n=== Test 6: Save and delete from another instance ===")
+        api_manager.save_llm_settings('u', 't', 'openai', 'sk-test-5678', 'model-b')
+        assert config_manager.get_llm_settings('u', 't').api_key == 'sk-test-5678'
+        api_manager.delete_llm_settings('u', 't')
+        assert config_manager.get_llm_settings('u', 't') is None
+        assert len(decrypts) == 2
+        api_manager.close()
+        config_manager.close()
+        print("✓ Cache invalidated on save and delete")
+
+
+def test_legacy_api_key_migration():
+    """Test that double base64 encoded API keys are rewritten as Fernet tokens"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = make_manager(tmp_dir)
+        manager.save_llm_settings('u', 't', 'anthropic', 'sk-new-1234', 'model-a')
+        legacy = base64.b64encode(manager.cipher.encrypt(b'sk-legacy-5678')).decode()
+        with manager._transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO llm_settings (user_id, tenant, provider, api_key_encrypted, model) VALUES (?, ?, ?, ?, ?)",
+                ('legacy', 't', 'anthropic', legacy, 'model-a')
+            )
+        manager.close()
+
+        print("\n=== Test 7: Legacy rows on startup ===")
+        manager = make_manager(tmp_dir)
+        with manager._cursor() as cursor:
+            stored = dict(cursor.execute("SELECT user_id, api_key_encrypted FROM llm_settings").fetchall())
+        assert all(key.startswith('gAAAAA') for key in stored.values()), stored
+        assert len(stored['u']) < len(legacy)
+        assert manager.get_llm_settings('legacy', 't').api_key == 'sk-legacy-5678'
+        assert manager.get_llm_settings('u', 't').api_key == 'sk-new-1234'
+        manager.close()
+        print("✓ Legacy key re-encoded, current keys untouched")
+
+
+if __name__ == '__main__':
+    test_wal_connection()
+    test_llm_settings_round_trip()
+    test_shared_connection_across_threads()
+    test_llm_settings_cache()
+    test_legacy_api_key_migration()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test script for markdown fence stripping of LLM responses
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.planner import _strip_fence
+
+
+def test_fenced_responses():
+    """Test that the JSON payload is extracted from fenced responses"""
+    print("\n=== Test 1: Fence variants ===")
+    assert _strip_fence('```json\n{"type": "final"}\n```') == '{"type": "final"}'
+    assert _strip_fence('```\n[1, 2]\n```  ') == '[1, 2]'
+    assert _strip_fence('Here is the plan:\n```json\n[{"a": 1}]\n```\nDone.') == '[{"a": 1}]'
+    assert _strip_fence('```json\n{"type": "final"') == '{"type": "final"'
+    assert _strip_fence('```JSON\n{"type": "final"}\n```') == '{"type": "final"}'
+    print("✓ Payload extracted with one regex search")
+
+
+def test_unfenced_responses():
+    """Test that bare JSON is returned as-is"""
+    print("\n=== Test 2: Bare JSON ===")
+    assert _strip_fence('  {"body": "use ```code```"}\n') == '{"body": "use ```code```"}'
+    assert _strip_fence('not json') == 'not json'
+    print("✓ Bare JSON and plain text untouched")
+
+
+if __name__ == '__main__':
+    test_fenced_responses()
+    test_unfenced_responses()
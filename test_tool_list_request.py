@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test script for answering tool listing requests without the LLM
+"""
+
+import asyncio
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from orchestration.llm_client import LLMClient
+from orchestration.planner import Planner, _TOOL_LIST_RE
+from orchestration.types import OrchestrationSettings, State, StateType, ToolDefinition, TraceContext
+
+
+class FailingClient(LLMClient):
+    """LLM client that must not be called"""
+
+    async def generate(self, messages, max_tokens=4096, system=None):
+        raise AssertionError("LLM called for a tool listing")
+
+
+def test_tool_listing_phrases():
+    """Test that only requests asking for the tool list are matched"""
+    print("\n=== Test 1: Tool listing requests ===")
+    for text in (
+        "What tools do you have?", "Show me your tools", "list all available tools",
+        "What can you do?", "사용 가능한 도구 알려줘", "어떤 도구가 있어?", "도구 목록 보여줘", "뭘 할 수 있어?",
+    ):
+        assert _TOOL_LIST_RE.fullmatch(text), text
+    print("✓ English and Korean phrasings matched")
+
+    print("\n=== Test 2: Requests mentioning tools ===")
+    for text in (
+        "What tools do you have for booking a meeting?", "Send the tool list to John",
+        "어떤 도구로 회의를 잡을 수 있어?", "도구 목록을 John에게 보내줘", "내일 일정 알려줘",
+    ):
+        assert not _TOOL_LIST_RE.fullmatch(text), text
+    print("✓ Other requests go to the LLM")
+
+
+def test_tool_listing_skips_llm():
+    """Test that a tool listing is answered from the pre-formatted tools"""
+    tools = [ToolDefinition(name='send_email', description='Send an email', input_schema={})]
+    planner = Planner(OrchestrationSettings(llm_api_key='test', llm_model='test', available_tools=tools))
+    planner.llm_client = FailingClient()
+    state = State(
+        type=StateType.PLAN_OR_DECIDE, session_id='s', user_id='u', tenant='t',
+        request_text='What tools do you have?', trace=TraceContext(trace_id='trace')
+    )
+
+    print("\n=== Test 3: Planner answer ===")
+    state = asyncio.run(planner.invoke(state))
+    assert state.type == StateType.FINAL
+    assert state.final_payload["data"]["tool_count"] == 1
+    assert "**send_email**" in state.final_payload["message"]
+    print("✓ Tool list returned without an LLM call")
+
+
+def test_tool_schemas_in_catalog():
+    """Test that tools differing only in input schema get their own catalog"""
+    def make_planner(schema):
+        tools = [ToolDefinition(name='send_email', description='Send an email', input_schema=schema)]
+        return Planner(OrchestrationSettings(llm_api_key='test', llm_model='test', available_tools=tools))
+
+    print("\n=== Test 4: Same tool names, different schemas ===")
+    first = make_planner({'type': 'object', 'properties': {'to': {'type': 'string'}}})
+    second = make_planner({'type': 'object', 'properties': {'recipients': {'type': 'array'}}})
+    assert '"recipients"' in second._tools_detailed and '"recipients"' not in first._tools_detailed
+    assert first._tools_fingerprint != second._tools_fingerprint
+    print("✓ Catalog and fingerprint follow the schema")
+
+    print("\n=== Test 5: Schema changed in place ===")
+    fingerprint = first._tools_fingerprint
+    first.settings.available_tools[0].input_schema['properties']['cc'] = {'type': 'string'}
+    first.invalidate_tools_cache()
+    assert '"cc"' in first._tools_detailed
+    assert first._tools_fingerprint != fingerprint
+    print("✓ Re-formatted after invalidate_tools_cache")
+
+
+if __name__ == '__main__':
+    test_tool_listing_phrases()
+    test_tool_listing_skips_llm()
+    test_tool_schemas_in_catalog()